@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres', # <---- full-text and trigram search lookups
     'corsheaders',  # <---- CORS headers package
     'main_app', # <---- your app name here
     'rest_framework', # <---- rest framework package
@@ -55,6 +56,9 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'main_app.CustomUser'
 
+# Username or email sign-in with a single lookup and a single password hash
+AUTHENTICATION_BACKENDS = ['main_app.backends.UsernameOrEmailBackend']
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # <---- CORS middleware (must be at the top)
     'django.middleware.security.SecurityMiddleware',
@@ -115,6 +119,65 @@ DATABASES = {
     )
 }
 
+# Read replicas: comma separated database URLs, added as replica1, replica2... GET requests
+# read from a healthy replica unless the user wrote within REPLICA_STICKY_SECONDS (see
+# main_app.routers). Replicas lagging more than REPLICA_MAX_LAG_SECONDS get no reads, the lag
+# is checked every REPLICA_CHECK_INTERVAL seconds.
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'} # Tests read the test database through it
+    DATABASE_REPLICAS.append(alias)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['main_app.routers.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'main_app.routers.ReplicaMiddleware')
+
+# Connection pool (PostgreSQL, psycopg 3). Instead of one persistent connection per worker
+# thread, every worker process shares a pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE
+# connections between its threads: a request takes one at its first query and gives it back
+# when it ends, requests answered from the caches take none. A request waits up to
+# DB_POOL_TIMEOUT seconds for a free connection. The database sees at most
+# workers * DB_POOL_MAX_SIZE connections per alias, see gunicorn.conf.py.
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_OPTIONS = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')), # Seconds before an idle connection above min_size is closed
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+}
+if DB_POOL:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database['CONN_MAX_AGE'] = 0 # Required by the pool, which keeps the connections open
+            database.setdefault('OPTIONS', {})['pool'] = dict(DB_POOL_OPTIONS)
+
+
+# Cache
+# Local memory by default. Set CACHE_BACKEND/CACHE_LOCATION (e.g. redis or memcached) to share
+# the cache between the workers: the cached user stats, responses and authenticated users are
+# only used with a shared cache (main_app.utils.shared_cache).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Per-user stats cache, updated incrementally by the attendance and event views (shared
+# CACHE_BACKEND only)
+USER_STATS_CACHE = os.getenv('USER_STATS_CACHE', 'False') == 'True'
+USER_STATS_CACHE_TIMEOUT = int(os.getenv('USER_STATS_CACHE_TIMEOUT', '86400'))
+
+# Versioned response cache and ETags for the event list/detail endpoints (shared CACHE_BACKEND
+# only)
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'False') == 'True'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -167,10 +230,101 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'main_app.authentication.CachedJWTAuthentication',
+    ),
+    # orjson when installed, DRF's stdlib json implementation otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'main_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'main_app.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Process-local cache of the authenticated users (seconds / entries), only used with a shared
+# CACHE_BACKEND: its invalidation goes through the Django cache (main_app.authentication)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+
+# Cursor pagination for the event lists (used when ?cursor= or ?page_size= is passed)
+EVENT_PAGE_SIZE = int(os.getenv('EVENT_PAGE_SIZE', '20'))
+EVENT_MAX_PAGE_SIZE = int(os.getenv('EVENT_MAX_PAGE_SIZE', '100'))
+# Page size of the compact attendee list (?compact=true)
+ATTENDEE_PAGE_SIZE = int(os.getenv('ATTENDEE_PAGE_SIZE', '100'))
+ATTENDEE_MAX_PAGE_SIZE = int(os.getenv('ATTENDEE_MAX_PAGE_SIZE', '1000'))
+
+# Live attendee counts (/api/events/<id>/live/, server-sent events under ASGI). The broker
+# carries the updates between processes: main_app.live.LocalBroker within one process,
+# main_app.live.CacheBroker through the shared cache (polled every LIVE_POLL_INTERVAL seconds).
+LIVE_BROKER = os.getenv('LIVE_BROKER', 'main_app.live.LocalBroker')
+LIVE_POLL_INTERVAL = float(os.getenv('LIVE_POLL_INTERVAL', '1'))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv('LIVE_KEEPALIVE_SECONDS', '15'))
+LIVE_RETRY_MS = int(os.getenv('LIVE_RETRY_MS', '3000')) # Client reconnection delay
+LIVE_QUEUE_SIZE = 16 # Messages kept per slow stream
+
+# Change feed (/api/changes/): rows per stream and page, how far behind now it reads (longer
+# than any write transaction, see main_app.changes) and how long tombstones are kept (days)
+CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', '500'))
+CHANGES_MAX_PAGE_SIZE = int(os.getenv('CHANGES_MAX_PAGE_SIZE', '2000'))
+CHANGES_LAG_SECONDS = float(os.getenv('CHANGES_LAG_SECONDS', '5'))
+CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', '30'))
+
+# Longest ?from=/?to= range of the event calendar (days)
+EVENT_CALENDAR_MAX_DAYS = int(os.getenv('EVENT_CALENDAR_MAX_DAYS', '400'))
+
+# Maximum number of ids in one bulk attendance request
+BULK_ATTENDANCE_MAX_ITEMS = int(os.getenv('BULK_ATTENDANCE_MAX_ITEMS', '10000'))
+
+# Route the read endpoints (event list/detail, my events, stats) to native async views,
+# for ASGI servers (e.g. uvicorn Event_Planner_Project.asgi:application)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Event export/import: rows fetched per database round trip / rows per INSERT
+EVENT_EXPORT_CHUNK_SIZE = int(os.getenv('EVENT_EXPORT_CHUNK_SIZE', '2000'))
+EVENT_IMPORT_BATCH_SIZE = int(os.getenv('EVENT_IMPORT_BATCH_SIZE', '1000'))
+# Largest import: rows read per request / request body in bytes
+EVENT_IMPORT_MAX_ROWS = int(os.getenv('EVENT_IMPORT_MAX_ROWS', '10000'))
+EVENT_IMPORT_MAX_BYTES = int(os.getenv('EVENT_IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))
+
+# Event search backend (dotted path). Empty picks the full-text backend on PostgreSQL
+# and the icontains backend on other databases.
+EVENT_SEARCH_BACKEND = os.getenv('EVENT_SEARCH_BACKEND', '')
+EVENT_SEARCH_CONFIG = os.getenv('EVENT_SEARCH_CONFIG', 'english') # PostgreSQL text search configuration
+
+# Per request query count, database time and repeated queries (Server-Timing header + a
+# JSON log line on the main_app.queries logger). A query run at least
+# QUERY_DUPLICATE_THRESHOLD times in one request is reported as repeated.
+QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION', 'False') == 'True'
+QUERY_DUPLICATE_THRESHOLD = int(os.getenv('QUERY_DUPLICATE_THRESHOLD', '3'))
+if QUERY_INSTRUMENTATION:
+    MIDDLEWARE.insert(1, 'main_app.middleware.QueryInstrumentationMiddleware')
+
+# Request counts, latency histograms, database time and cache hit/miss counters, served in the
+# Prometheus text format at /api/metrics/. With several worker processes set METRICS_DIR to a
+# directory shared by the workers, each one writes its metrics there (gunicorn.conf.py archives
+# the files of exited workers, empty it on restart under other servers).
+# METRICS_TOKEN, when set, is required as `Authorization: Bearer <token>` to read them.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5')) # Seconds
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'main_app.metrics.MetricsMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'main_app.queries': {'handlers': ['console'], 'level': os.getenv('QUERY_LOG_LEVEL', 'INFO'), 'propagate': False},
+    },
+}
+
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS').split(',')
@@ -183,4 +337,23 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-}
\ No newline at end of file
+    'TOKEN_REFRESH_SERIALIZER': 'main_app.tokens.CachedTokenRefreshSerializer',
+}
+
+# Token bucket rate limits of the password hashing endpoints and the event import, '<scope>.<ip|account>': 'requests/period'
+# (see main_app.throttling). AUTH_THROTTLE_RATES overrides some of them, e.g. 'signin.ip=50/min,signup.ip=20/h'
+AUTH_THROTTLE = os.getenv('AUTH_THROTTLE', 'True') == 'True'
+AUTH_THROTTLE_RATES = {
+    'signin.ip': '20/min',
+    'signin.account': '5/min',
+    'signup.ip': '10/min',
+    'token.ip': '20/min',
+    'token.account': '5/min',
+    'token_refresh.ip': '60/min',
+    'password_update.account': '5/min',
+    'import.account': '10/h',
+}
+AUTH_THROTTLE_RATES.update(item.split('=', 1) for item in os.getenv('AUTH_THROTTLE_RATES', '').split(',') if item)
+
+# Process-local cache of recently blacklisted refresh token JTIs (entries)
+TOKEN_BLACKLIST_CACHE_SIZE = int(os.getenv('TOKEN_BLACKLIST_CACHE_SIZE', '10000'))
\ No newline at end of file
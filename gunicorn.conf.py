@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+# Gunicorn settings, loaded automatically when gunicorn starts in the project directory:
+#   DB_POOL=True gunicorn Event_Planner_Project.wsgi
+# Threaded workers (gthread): GUNICORN_WORKERS processes of GUNICORN_THREADS threads each. With
+# DB_POOL=True the threads of a worker share its DB_POOL_MAX_SIZE connections, so the threads
+# can outnumber the connections: requests served from the caches need none, the others wait
+# for one (DB_POOL_TIMEOUT). The database then sees at most workers * DB_POOL_MAX_SIZE
+# connections (per replica too) instead of workers * threads. Measure the tradeoff with
+# `python manage.py benchmark_db_pool`.
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count())))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5 # Seconds an idle keep-alive connection from the proxy stays open
+
+# Restart workers every few thousand requests (jittered so they do not restart together)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = max_requests // 10
+
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None # Heartbeat file off the disk
+
+def worker_exit(server, worker):
+    # Close the worker's connection pools so the database sees the connections end cleanly
+    from django.db import connections
+    for alias in connections:
+        close_pool = getattr(connections[alias], 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
+
+def child_exit(server, worker):
+    # Add the metrics file of the exited worker to the archive and remove it (main_app.metrics)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Event_Planner_Project.settings')
+    from main_app import metrics
+    metrics.archive_worker(worker.pid)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class MainAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main_app'
+
+    def ready(self):
+        from django.conf import settings
+        if settings.METRICS_ENABLED:
+            # Database time of every request, see main_app.metrics
+            from django.db.backends.signals import connection_created
+            from main_app.metrics import install_db_wrapper
+            connection_created.connect(install_db_wrapper, dispatch_uid='main_app.metrics')
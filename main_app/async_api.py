@@ -0,0 +1,74 @@
+from asgiref.sync import sync_to_async
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from main_app.authentication import CachedJWTAuthentication
+from main_app.renderers import FastJSONParser, FastJSONRenderer
+
+# ================ ASYNC API VIEW ================
+# DRF's APIView is synchronous, under ASGI Django runs it (and everything it calls) in a
+# worker thread. AsyncAPIView is a native async Django view that keeps the parts of the
+# APIView contract the read endpoints rely on: JWT authentication (IsAuthenticated), DRF
+# throttle classes, a DRF Request (query_params, user) for the serializers and the paginator,
+# DRF exceptions turned into the usual error responses, and JSON rendering of Response objects.
+class AsyncAPIView(View):
+    authentication_class = CachedJWTAuthentication
+    renderer_class = FastJSONRenderer
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authentication only, like APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+        self.request = Request(request, parsers=[FastJSONParser()])
+        authenticator = self.authentication_class()
+        try:
+            if getattr(request, '_force_auth_user', None) is not None:
+                # APIClient.force_authenticate(), honoured like APIView does
+                result = (request._force_auth_user, getattr(request, '_force_auth_token', None))
+            else:
+                result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            self.request.user, self.request.auth = result
+            if self.throttle_classes:
+                # The throttles read and write the cache synchronously
+                await sync_to_async(self.check_throttles)(self.request)
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(self.request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(exc, authenticator)
+        return self.finalize_response(response)
+
+    # Same as APIView.check_throttles()
+    def check_throttles(self, request):
+        durations = []
+        for throttle in (throttle_class() for throttle_class in self.throttle_classes):
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+        if durations:
+            durations = [duration for duration in durations if duration is not None]
+            raise exceptions.Throttled(max(durations, default=None))
+
+    def handle_exception(self, exc, authenticator):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # Same as APIView: 401 with the WWW-Authenticate challenge
+            exc.auth_header = authenticator.authenticate_header(self.request)
+        return exception_handler(exc, {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': self.request})
+
+    def finalize_response(self, response):
+        # Django renders the response after the view returns (deferred rendering)
+        if not getattr(response, 'accepted_renderer', None):
+            response.accepted_renderer = self.renderer_class()
+            response.accepted_media_type = self.renderer_class.media_type
+        response.renderer_context = {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': self.request}
+        return response
+# ================ END OF ASYNC API VIEW ================
@@ -0,0 +1,164 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from main_app.models import Event, Attendee
+from main_app import caching, changes, live, stats
+
+# ================ ATTENDANCE WRITES ================
+# Every attendance change goes through these functions so the attendee row and the
+# counters stored on the event are updated in the same transaction. The counters are
+# updated with F() expressions, so concurrent requests never lose an increment.
+# Queryset updates skip auto_now, they set updated_at for the change feed themselves.
+
+def _bump_counters(event_id, attendees=0, confirmed=0):
+    Event.objects.filter(pk=event_id).update(
+        attendee_count=F('attendee_count') + attendees,
+        confirmed_count=F('confirmed_count') + confirmed,
+        updated_at=timezone.now(),
+    )
+
+# Returns (attendee, created)
+def register(user, event):
+    with transaction.atomic():
+        attendee, created = Attendee.objects.get_or_create(user=user, event=event)
+        if created:
+            _bump_counters(event.pk, attendees=1)
+    if created:
+        stats.record_attendance_added(user.pk, event)
+        caching.bump_event_versions(event.pk)
+        live.publish_counts([event.pk], 'registered', user.pk)
+    return attendee, created
+
+# Confirm/decline return True when the status changed.
+# Raise Attendee.DoesNotExist when the user is not registered.
+def _set_confirmed(user, event, confirmed):
+    with transaction.atomic():
+        # Conditional update: only the request that actually flips the flag moves the counter
+        changed = Attendee.objects.filter(user=user, event=event, confirmed=not confirmed).update(
+            confirmed=confirmed, updated_at=timezone.now(),
+        )
+        if changed:
+            _bump_counters(event.pk, confirmed=1 if confirmed else -1)
+        elif not Attendee.objects.filter(user=user, event=event).exists():
+            raise Attendee.DoesNotExist
+    return bool(changed)
+
+def confirm(user, event):
+    changed = _set_confirmed(user, event, True)
+    if changed:
+        stats.record_attendance_confirmed(user.pk, event)
+        caching.bump_event_versions(event.pk)
+        live.publish_counts([event.pk], 'confirmed', user.pk)
+    return changed
+
+def decline(user, event):
+    changed = _set_confirmed(user, event, False)
+    if changed:
+        stats.record_attendance_declined(user.pk, event)
+        caching.bump_event_versions(event.pk)
+        live.publish_counts([event.pk], 'declined', user.pk)
+    return changed
+
+# Raises Attendee.DoesNotExist when the user is not registered
+def cancel(user, event):
+    with transaction.atomic():
+        attendee = Attendee.objects.select_for_update().get(user=user, event=event)
+        changes.record_cancelled_attendances([attendee])
+        attendee.delete()
+        _bump_counters(event.pk, attendees=-1, confirmed=-1 if attendee.confirmed else 0)
+    stats.record_attendance_removed(user.pk, event, attendee.confirmed)
+    caching.bump_event_versions(event.pk)
+    live.publish_counts([event.pk], 'cancelled', user.pk)
+    return attendee
+
+# Called before a user is deleted, the cascade removes their attendee rows
+def remove_user_attendances(user):
+    attended = Event.objects.filter(attendees__user=user)
+    caching.bump_events_in(attended)
+    live.publish_counts(list(attended.values_list('pk', flat=True)), 'cancelled', user.pk)
+    now = timezone.now()
+    # One filter() call: both conditions apply to the same (the user's) attendee row
+    Event.objects.filter(attendees__user=user, attendees__confirmed=True).update(
+        confirmed_count=F('confirmed_count') - 1, updated_at=now,
+    )
+    attended.update(attendee_count=F('attendee_count') - 1, updated_at=now)
+
+# Recompute the counters of the given events from the attendee rows
+def refresh_counters(events):
+    def count(queryset):
+        totals = queryset.order_by().values('event').annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+    attendees = Attendee.objects.filter(event=OuterRef('pk'))
+    caching.bump_events_in(events)
+    return events.update(
+        attendee_count=count(attendees),
+        confirmed_count=count(attendees.filter(confirmed=True)),
+        updated_at=timezone.now(),
+    )
+# ================ END OF ATTENDANCE WRITES ================
+
+# ================ BULK ATTENDANCE ================
+# Apply one action to many attendances at once: many users of one event (organizer) or many
+# events of one user. Whatever the number of items, this runs a lookup of the existing rows,
+# one bulk INSERT (register) or one conditional UPDATE/DELETE, and the counter refresh, all in
+# one transaction. Returns the outcome of every item, in the order the ids were given.
+BULK_ACTIONS = ('register', 'confirm', 'decline', 'cancel')
+BULK_DONE = {'register': 'registered', 'confirm': 'confirmed', 'decline': 'declined', 'cancel': 'cancelled'}
+
+# Inserts the attendee rows of `items`, returns the items whose row this call created. One
+# INSERT, unless a concurrent request registered one of the pairs since they were looked up:
+# the unique constraint then rolls the INSERT back and the rows are inserted one by one.
+def _bulk_register(scope, key, items):
+    try:
+        with transaction.atomic(): # Savepoint, a conflict only rolls back the INSERT
+            Attendee.objects.bulk_create([Attendee(**scope, **{key: item}) for item in items])
+        return items
+    except IntegrityError:
+        return [item for item in items if Attendee.objects.get_or_create(**scope, **{key: item})[1]]
+
+def bulk_apply(action, ids, event=None, user=None):
+    if (event is None) == (user is None):
+        raise ValueError('bulk_apply needs either an event or a user')
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown bulk action: {action}')
+    # Items are users of the event, or events of the user
+    key, scope = ('user_id', {'event_id': event.pk}) if event is not None else ('event_id', {'user_id': user.pk})
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        attendees = Attendee.objects.filter(**scope)
+        existing = dict(attendees.filter(**{f'{key}__in': ids}).values_list(key, 'confirmed'))
+        if action == 'register':
+            model = get_user_model() if key == 'user_id' else Event
+            valid = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            changed = _bulk_register(scope, key, [item for item in ids if item in valid and item not in existing])
+            outcomes = {
+                item: 'registered' if item in changed else 'already_registered' if item in valid else 'not_found'
+                for item in ids
+            }
+        elif action == 'cancel':
+            changed = [item for item in ids if item in existing]
+            cancelled = attendees.filter(**{f'{key}__in': changed})
+            changes.record_cancelled_attendances(cancelled)
+            cancelled.delete()
+            outcomes = {item: 'cancelled' if item in existing else 'not_registered' for item in ids}
+        else:
+            confirmed = action == 'confirm'
+            changed = [item for item in ids if existing.get(item) is (not confirmed)]
+            attendees.filter(**{f'{key}__in': changed}, confirmed=not confirmed).update(
+                confirmed=confirmed, updated_at=timezone.now(),
+            )
+            done = BULK_DONE[action]
+            outcomes = {
+                item: done if item in changed else f'already_{done}' if item in existing else 'not_registered'
+                for item in ids
+            }
+        if changed:
+            event_ids = changed if key == 'event_id' else [event.pk]
+            refresh_counters(Event.objects.filter(pk__in=event_ids))
+            live.publish_counts(event_ids, BULK_DONE[action], user.pk if user is not None else None)
+    if changed:
+        stats.invalidate_user_stats(*(changed if key == 'user_id' else [user.pk]))
+    return [{key: item, 'status': outcomes[item]} for item in ids]
+# ================ END OF BULK ATTENDANCE ================
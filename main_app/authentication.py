@@ -0,0 +1,124 @@
+import copy
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from main_app.metrics import record_cache
+from main_app.routers import use_primary
+from main_app.utils import LocalTTLCache, shared_cache
+
+# ================ CACHED JWT AUTHENTICATION ================
+# simplejwt's JWTAuthentication loads the user row on every request. This subclass keeps the
+# user objects in a bounded, TTL-limited cache local to the worker process, keyed by user id
+# and the user's auth version. The version lives in the shared Django cache and is replaced
+# by invalidate_user() (profile update, password change, account deletion), which makes the
+# entries cached by every worker unreachable. That only holds when the Django cache is shared
+# by the workers (CACHE_BACKEND, e.g. redis or memcached): with the default local memory cache
+# each worker would have its own version and an invalidation would only reach one of them, so
+# the users are then not cached and every request loads its user like simplejwt does.
+_users = LocalTTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+def user_cache_enabled():
+    return shared_cache()
+
+def _version_key(user_id):
+    return f'auth-user:{user_id}:version'
+
+def get_user_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+async def aget_user_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+def invalidate_user(user_id):
+    def replace_version():
+        cache.set(_version_key(user_id), uuid.uuid4().hex, timeout=None)
+    # Once committed, so a concurrent request cannot cache the old row under the new version
+    transaction.on_commit(replace_version)
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not user_cache_enabled():
+            return super().get_user(validated_token) # Raises InvalidToken without user id
+        key = (user_id, get_user_version(user_id))
+        user = _users.get(key)
+        record_cache('auth_user', user is not None)
+        if user is None:
+            with use_primary(): # Cached under the current version, not from a lagging replica
+                user = super().get_user(validated_token)
+            _users.set(key, user)
+        else:
+            self.check_revoked(validated_token, user)
+        # Each request gets its own copy, views modify and save request.user
+        return copy.copy(user)
+
+    def check_revoked(self, validated_token, user):
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+    # Async twins of authenticate()/get_user() for the async views, the user row is
+    # loaded with the async ORM and the version with the async cache API
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token) # Raises InvalidToken
+        if not user_cache_enabled():
+            return await self.aload_user(user_id, validated_token)
+        key = (user_id, await aget_user_version(user_id))
+        user = _users.get(key)
+        record_cache('auth_user', user is not None)
+        if user is None:
+            with use_primary():
+                user = await self.aload_user(user_id, validated_token)
+            _users.set(key, user)
+        else:
+            self.check_revoked(validated_token, user)
+        return copy.copy(user)
+
+    async def aload_user(self, user_id, validated_token):
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        self.check_revoked(validated_token, user)
+        return user
+
+# Browsers' EventSource cannot send an Authorization header, the live event streams also
+# accept the access token as ?access_token=
+class QueryTokenJWTAuthentication(CachedJWTAuthentication):
+    def get_header(self, request):
+        header = super().get_header(request)
+        if header is None and request.GET.get('access_token'):
+            header = f'{api_settings.AUTH_HEADER_TYPES[0]} {request.GET["access_token"]}'.encode()
+        return header
+# ================ END OF CACHED JWT AUTHENTICATION ================
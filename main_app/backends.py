@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+UserModel = get_user_model()
+
+# ================ AUTHENTICATION BACKEND ================
+# Sign in with a username or an email (case-insensitive) using one query and exactly one
+# password hash, whatever the input is. Unknown users still pay for one hash so response
+# times do not reveal which accounts exist.
+class UsernameOrEmailBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        candidates = list(
+            UserModel._default_manager.filter(Q(username__iexact=username) | Q(email__iexact=username))[:2]
+        )
+        # The input can be one user's username and another user's email, the username wins
+        user = next(
+            (candidate for candidate in candidates if candidate.username.lower() == username.lower()),
+            candidates[0] if candidates else None,
+        )
+        if user is None:
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+# ================ END OF AUTHENTICATION BACKEND ================
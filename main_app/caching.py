@@ -0,0 +1,111 @@
+import hashlib
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from main_app.metrics import record_cache
+from main_app.routers import read_from_primary
+from main_app.utils import shared_cache
+
+# ================ VERSIONED RESPONSE CACHE ================
+# Event responses are cached under a key built from version tokens stored in the cache:
+#   - one token per event, changed on every write to the event or its attendees
+#   - one token for the event lists, changed on every event/attendee write
+#   - one token for user profiles, changed when a user shown as `created_by` changes
+# The same key is the response ETag, so a client sending it back in If-None-Match gets a 304
+# without any serialization or database access. Enabled with settings.RESPONSE_CACHE and a
+# shared CACHE_BACKEND: with a cache local to each worker, a write would only change the
+# versions of the worker that made it, the others would keep serving (and 304ing) the old body.
+LIST_VERSION_KEY = 'events:version'
+PROFILE_VERSION_KEY = 'profiles:version'
+
+def enabled():
+    return settings.RESPONSE_CACHE and shared_cache()
+
+def _event_version_key(event_id):
+    return f'event:{event_id}:version'
+
+def _new_version():
+    # Random tokens instead of counters: an evicted version never comes back with an old value
+    return uuid.uuid4().hex
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+# The versions change once the write is committed, a response built from the old rows
+# in the meantime is stored under the old version and never served again
+def _set_versions(keys):
+    transaction.on_commit(lambda: cache.set_many({key: _new_version() for key in keys}, timeout=None))
+
+def bump_event_versions(*event_ids):
+    if enabled():
+        _set_versions([LIST_VERSION_KEY, *(_event_version_key(event_id) for event_id in event_ids)])
+
+def bump_events_in(queryset):
+    if enabled():
+        bump_event_versions(*queryset.values_list('pk', flat=True))
+
+def bump_profile_version():
+    if enabled():
+        _set_versions([LIST_VERSION_KEY, PROFILE_VERSION_KEY])
+
+# Responses depend on the requesting user (user_attendance_status) and the query string
+def event_detail_parts(request, event_id):
+    versions = _get_versions([_event_version_key(event_id), PROFILE_VERSION_KEY])
+    return ['detail', str(event_id), str(request.user.pk), *versions]
+
+def event_list_parts(request):
+    versions = _get_versions([LIST_VERSION_KEY])
+    return ['list', request.get_full_path(), str(request.user.pk), *versions]
+
+# Returns (etag, response). The response is a 304 or the cached 200 when there is one,
+# otherwise None and the view builds the response and passes it to store().
+def lookup(request, get_parts, *args):
+    if not enabled():
+        return None, None
+    etag = '"%s"' % hashlib.sha1('|'.join(get_parts(request, *args)).encode()).hexdigest()
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        record_cache('response', True)
+        return etag, _finalize(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    data = cache.get(f'response:{etag}')
+    record_cache('response', data is not None)
+    if data is None:
+        # The response will be stored under the current versions: built from the primary, a
+        # lagging replica could still return the rows from before the last version change
+        read_from_primary()
+        return etag, None
+    return etag, _finalize(Response(data, status=status.HTTP_200_OK), etag)
+
+def store(etag, response):
+    if etag is None or response.status_code != status.HTTP_200_OK:
+        return response
+    cache.set(f'response:{etag}', response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+    return _finalize(response, etag)
+
+# For the async views. The version and response lookups are several cache round trips, they
+# run in a thread like the default implementation of Django's async cache API
+async def alookup(request, get_parts, *args):
+    if not enabled():
+        return None, None
+    return await sync_to_async(lookup)(request, get_parts, *args)
+
+async def astore(etag, response):
+    if etag is None:
+        return response
+    return await sync_to_async(store)(etag, response)
+
+def _finalize(response, etag):
+    response['ETag'] = etag
+    # Per-user data: browsers may keep it but must revalidate it on every use
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+# ================ END OF VERSIONED RESPONSE CACHE ================
@@ -0,0 +1,138 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from main_app.models import Event, Attendee, Tombstone
+from main_app.routers import read_from_primary
+
+# ================ TOMBSTONES ================
+# Called in the transaction that deletes the rows, before the delete
+def record_deleted_events(events):
+    if isinstance(events, QuerySet):
+        ids = list(events.values_list('pk', flat=True))
+    else:
+        ids = [event.pk for event in events]
+    Tombstone.objects.bulk_create([
+        Tombstone(kind=Tombstone.EVENT, object_id=pk, event_id=pk) for pk in ids
+    ])
+
+def record_cancelled_attendances(attendees):
+    if isinstance(attendees, QuerySet):
+        rows = list(attendees.values_list('pk', 'user_id', 'event_id'))
+    else:
+        rows = [(attendee.pk, attendee.user_id, attendee.event_id) for attendee in attendees]
+    Tombstone.objects.bulk_create([
+        Tombstone(kind=Tombstone.ATTENDANCE, object_id=pk, user_id=user_id, event_id=event_id)
+        for pk, user_id, event_id in rows
+    ])
+# ================ END OF TOMBSTONES ================
+
+# ================ CHANGE FEED ================
+# What changed since the client's cursor: the events (every event, like the event list), the
+# user's attendances and the tombstones of deleted events / the user's cancelled attendances.
+# Each of the three streams is read in (timestamp, id) order from its index, so a sync costs
+# the number of changes, not the number of events.
+#
+# Timestamps are set when a transaction writes a row, not when it commits: a row stamped at
+# 10:00:00 may become visible after rows stamped 10:00:01 were returned. The feed therefore
+# only returns rows stamped before now - CHANGES_LAG_SECONDS (longer than any write
+# transaction and the clock skew between servers), and the cursor moves up to that instant,
+# never past a row that could still commit. Within that window a sync is paginated with
+# (timestamp, id) keyset positions.
+class CursorExpired(Exception):
+    pass
+
+class ChangeFeed:
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.page_size = self.get_page_size(request)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return settings.CHANGES_PAGE_SIZE
+        return min(max(page_size, 1), settings.CHANGES_MAX_PAGE_SIZE)
+
+    # A cursor holds the upper bound of the window being synced (None once it is complete)
+    # and every stream's position: [timestamp, id] after which to continue, id None when
+    # everything up to the timestamp was returned
+    @staticmethod
+    def encode_cursor(until, positions):
+        def encode(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+        state = {
+            'u': encode(until),
+            **{name: None if position is None else [encode(position[0]), position[1]] for name, position in positions.items()},
+        }
+        data = json.dumps(state, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    # Raises ValueError when the cursor is invalid
+    @staticmethod
+    def decode_cursor(encoded):
+        def decode(value):
+            return datetime.fromisoformat(value) if value is not None else None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            positions = {
+                name: None if state[name] is None else (decode(state[name][0]), None if state[name][1] is None else int(state[name][1]))
+                for name in ('e', 'a', 't')
+            }
+            return decode(state['u']), positions
+        except (TypeError, ValueError, KeyError, IndexError, UnicodeEncodeError):
+            raise ValueError('Invalid cursor')
+
+    def streams(self):
+        from main_app.serializers import EventSerializer # serializers -> attendance -> this module
+        return {
+            'e': (EventSerializer.setup_eager_loading(Event.objects.all(), self.request), 'updated_at'),
+            'a': (Attendee.objects.filter(user=self.user).only('id', 'event_id', 'confirmed', 'updated_at'), 'updated_at'),
+            't': (Tombstone.objects.filter(Q(user__isnull=True) | Q(user=self.user)), 'deleted_at'),
+        }
+
+    def read(self, queryset, field, position, until):
+        queryset = queryset.filter(**{f'{field}__lte': until})
+        if position is not None:
+            timestamp, pk = position
+            after = Q(**{f'{field}__gt': timestamp})
+            if pk is not None:
+                after |= Q(**{field: timestamp, 'pk__gt': pk})
+            queryset = queryset.filter(after)
+        rows = list(queryset.order_by(field, 'pk')[:self.page_size + 1])
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            return rows, (getattr(rows[-1], field), rows[-1].pk)
+        return rows, None # Up to date with the window
+
+    # Raises ValueError (invalid cursor) and CursorExpired (tombstones already pruned, the
+    # client has to download everything again and start over without a cursor)
+    def get_changes(self, encoded):
+        read_from_primary() # A lagging replica would miss rows the cursor moves past
+        now = timezone.now()
+        if encoded:
+            until, positions = self.decode_cursor(encoded)
+            tombstones = positions['t']
+            if tombstones is not None and tombstones[0] < now - timedelta(days=settings.CHANGES_RETENTION_DAYS):
+                raise CursorExpired
+        else:
+            # First sync: every event and attendance, the past deletions are irrelevant
+            until, positions = None, {'e': None, 'a': None, 't': None}
+        until = until or now - timedelta(seconds=settings.CHANGES_LAG_SECONDS)
+        if not encoded:
+            positions['t'] = (until, None)
+        results, next_positions, has_more = {}, {}, False
+        for name, (queryset, field) in self.streams().items():
+            rows, position = self.read(queryset, field, positions[name], until)
+            results[name] = rows
+            if position is None:
+                next_positions[name] = (until, None)
+            else:
+                next_positions[name] = position
+                has_more = True
+        return results, self.encode_cursor(until if has_more else None, next_positions), has_more
+# ================ END OF CHANGE FEED ================
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+import uuid
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from main_app.models import Event
+from main_app.routers import use_primary
+
+# ================ LIVE EVENT UPDATES ================
+# Server-sent events with the attendee counts of an event (EventLiveView, ASGI only). The
+# attendance writes publish a message once committed, a broker carries it to every server
+# process and the process' hub hands it to the streams subscribed to the event: the message is
+# encoded once per process, then every stream only receives bytes from a queue.
+
+# SSE wire format, `data` is sent as one JSON line
+def sse(kind, data):
+    return f'event: {kind}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+KEEPALIVE = b': keepalive\n\n'
+
+class Hub:
+    # Subscriber queues by event id. Only used from the event loop of the ASGI server, other
+    # threads go through dispatch_threadsafe().
+    def __init__(self):
+        self.subscribers = {}
+        self.subscribed_at = {} # Event id -> time its first current stream subscribed
+        self.loop = None
+
+    def subscribe(self, event_id):
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        if event_id not in self.subscribers:
+            self.subscribers[event_id] = set()
+            self.subscribed_at[event_id] = time.time()
+        self.subscribers[event_id].add(queue)
+        return queue
+
+    def unsubscribe(self, event_id, queue):
+        queues = self.subscribers.get(event_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[event_id]
+                del self.subscribed_at[event_id]
+
+    def has_subscribers(self, event_id):
+        return event_id in self.subscribers
+
+    def dispatch(self, event_id, message):
+        for queue in self.subscribers.get(event_id, ()):
+            if queue.full():
+                queue.get_nowait() # Slow client: drop the oldest, the next message has the latest counts
+            queue.put_nowait(message)
+
+    def dispatch_threadsafe(self, event_id, message):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.dispatch(event_id, message)
+        else:
+            loop.call_soon_threadsafe(self.dispatch, event_id, message)
+
+hub = Hub()
+
+# ---------------- brokers ----------------
+# publish() is called by the process that made the change, after the commit. start() is called
+# on the event loop when the first stream of the process subscribes. wants() tells whether a
+# message for this event can reach anyone, publishing is skipped (no counts query) otherwise.
+class BaseBroker:
+    def publish(self, event_id, kind, data):
+        raise NotImplementedError
+
+    def start(self, hub):
+        pass
+
+    def wants(self, event_id):
+        return True
+
+# Single process (and tests): straight to this process' hub
+class LocalBroker(BaseBroker):
+    def publish(self, event_id, kind, data):
+        hub.dispatch_threadsafe(event_id, sse(kind, data))
+
+    def wants(self, event_id):
+        return hub.has_subscribers(event_id)
+
+# Several worker processes sharing a Django cache (Redis, Memcached): the latest message of an
+# event is stored under one key and every process polls the keys of the events it has streams
+# for, one get_many every LIVE_POLL_INTERVAL seconds whatever the number of streams. Messages
+# published between two polls are coalesced, the counts they carry are always the latest.
+class CacheBroker(BaseBroker):
+    def __init__(self):
+        self.task = None
+
+    def key(self, event_id):
+        return f'live:{event_id}'
+
+    def publish(self, event_id, kind, data):
+        message = {'id': uuid.uuid4().hex, 'at': time.time(), 'kind': kind, 'data': data}
+        cache.set(self.key(event_id), message, timeout=3600)
+
+    def start(self, hub):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.poll(hub))
+
+    async def poll(self, hub):
+        seen = {}
+        while True:
+            await asyncio.sleep(settings.LIVE_POLL_INTERVAL)
+            event_ids = list(hub.subscribers)
+            seen = {event_id: seen.get(event_id) for event_id in event_ids}
+            if not event_ids:
+                continue
+            messages = await cache.aget_many([self.key(event_id) for event_id in event_ids])
+            for event_id in event_ids:
+                message = messages.get(self.key(event_id))
+                if message is None or message['id'] == seen[event_id]:
+                    continue
+                seen[event_id] = message['id']
+                # Skip what was published before the streams read the current counts
+                if message['at'] >= hub.subscribed_at.get(event_id, 0):
+                    hub.dispatch(event_id, sse(message['kind'], message['data']))
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.LIVE_BROKER)()
+
+# ---------------- publishing ----------------
+def _counts(row):
+    return {
+        'event_id': row['pk'],
+        'attendee_count': row['attendee_count'],
+        'confirmed_count': row['confirmed_count'],
+        'pending_count': row['attendee_count'] - row['confirmed_count'],
+    }
+
+# New counts of the events after an attendance change (registered, confirmed, declined,
+# cancelled), sent once the transaction commits. One query for all the events.
+def publish_counts(event_ids, action, user_id=None):
+    broker = get_broker()
+    def send():
+        wanted = [event_id for event_id in event_ids if broker.wants(event_id)]
+        if not wanted:
+            return
+        for row in Event.objects.filter(pk__in=wanted).values('pk', 'attendee_count', 'confirmed_count'):
+            broker.publish(row['pk'], 'counts', {**_counts(row), 'action': action, 'user_id': user_id})
+    transaction.on_commit(send)
+
+def publish_deleted(event_id):
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.wants(event_id) and broker.publish(event_id, 'deleted', {'event_id': event_id}))
+
+# ---------------- streaming ----------------
+# Subscribes before reading the current counts (from the primary), so no change between the
+# two is missed
+async def open_stream(event_id):
+    broker = get_broker()
+    queue = hub.subscribe(event_id)
+    broker.start(hub)
+    with use_primary():
+        row = await Event.objects.filter(pk=event_id).values('pk', 'attendee_count', 'confirmed_count').afirst()
+    if row is None:
+        hub.unsubscribe(event_id, queue)
+        return None
+    return stream(event_id, queue, _counts(row))
+
+async def stream(event_id, queue, counts):
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'.encode() + sse('counts', counts)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE # Keeps proxies from closing an idle connection
+                continue
+            yield message
+            if message.startswith(b'event: deleted'):
+                return
+    finally:
+        # Client gone (the server cancels the stream) or event deleted
+        hub.unsubscribe(event_id, queue)
+# ================ END OF LIVE EVENT UPDATES ================
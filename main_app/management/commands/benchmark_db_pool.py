@@ -0,0 +1,152 @@
+import copy
+import importlib.util
+import multiprocessing
+import statistics
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Connection acquire latency and throughput of the connection modes, with 2x, 4x and 8x as
+# many concurrent requests as worker processes, e.g.
+#   python manage.py benchmark_db_pool --workers 4 --duration 10
+#   persistent   CONN_MAX_AGE=600, one connection per thread kept between requests (default)
+#   pooled       psycopg 3 pool per worker process (DB_POOL_* settings), CONN_MAX_AGE=0
+#   per-request  CONN_MAX_AGE=0 without pool, a new connection for every request
+# Every worker is a process and its requests are threads, like gunicorn's gthread workers. A
+# request goes through Django's connection handling of request_started/request_finished, runs
+# --queries queries and keeps the connection --hold-ms more (the view's own work). Acquire is
+# the time to get a usable connection, health check included, and connections the number of
+# distinct server connections the run used. PostgreSQL only.
+MODES = ('persistent', 'pooled', 'per-request')
+ALIAS = 'benchmark_db_pool'
+
+def get_database(mode, pool_size):
+    database = copy.deepcopy(connections.settings['default'])
+    database['OPTIONS'] = {name: value for name, value in database['OPTIONS'].items() if name != 'pool'}
+    database['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+    if mode == 'pooled':
+        database['OPTIONS']['pool'] = {
+            **settings.DB_POOL_OPTIONS,
+            'min_size': min(settings.DB_POOL_OPTIONS['min_size'], pool_size),
+            'max_size': pool_size,
+        }
+    return database
+
+# Runs in a worker process, sends its measurements to the parent through `results`
+def run_worker(database, threads, duration, queries, hold, results):
+    connections.settings[ALIAS] = database
+    acquires, latencies, pids, errors = [], [], set(), [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        connection = connections[ALIAS]
+        own_acquires, own_latencies, own_pids, failed = [], [], set(), 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            connection.close_if_unusable_or_obsolete() # request_started
+            try:
+                connection.ensure_connection()
+                connection.close_if_health_check_failed()
+                connection.ensure_connection() # Reconnects when the health check failed
+                acquired = time.perf_counter()
+                with connection.cursor() as cursor:
+                    for _ in range(queries):
+                        cursor.execute('SELECT pg_backend_pid()')
+                        own_pids.add(cursor.fetchone()[0])
+                time.sleep(hold)
+            except Exception: # Connection limit reached, pool timeout
+                failed += 1
+                continue
+            finally:
+                connection.close_if_unusable_or_obsolete() # request_finished
+            own_acquires.append(acquired - start)
+            own_latencies.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            acquires.extend(own_acquires)
+            latencies.extend(own_latencies)
+            pids.update(own_pids)
+            errors[0] += failed
+
+    clients = [threading.Thread(target=client) for _ in range(threads)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    close_pool = getattr(connections[ALIAS], 'close_pool', None)
+    if close_pool is not None:
+        close_pool()
+    results.put((acquires, latencies, pids, errors[0]))
+
+class Command(BaseCommand):
+    help = 'Compare connection acquire latency and throughput with persistent, pooled and per-request connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes')
+        parser.add_argument('--multipliers', type=int, nargs='+', default=[2, 4, 8],
+                            help='Concurrent requests per worker process')
+        parser.add_argument('--pool-size', type=int, default=settings.DB_POOL_OPTIONS['max_size'],
+                            help='Pool max size per worker (pooled mode)')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per request')
+        parser.add_argument('--hold-ms', type=float, default=2, help='Milliseconds the request keeps the connection after its queries')
+
+    def run(self, database, workers, threads, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        connections.close_all() # Nothing open is shared with the forked workers
+        processes = [
+            context.Process(target=run_worker, args=(
+                database, threads, options['duration'], options['queries'], options['hold_ms'] / 1000, results,
+            ))
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        acquires, latencies, pids, errors = [], [], set(), 0
+        for _ in processes:
+            worker_acquires, worker_latencies, worker_pids, worker_errors = results.get()
+            acquires += worker_acquires
+            latencies += worker_latencies
+            pids |= worker_pids
+            errors += worker_errors
+        for process in processes:
+            process.join()
+        return acquires, latencies, len(pids), errors, time.perf_counter() - start
+
+    def report(self, mode, clients, acquires, latencies, connection_count, errors, elapsed):
+        if len(latencies) < 2:
+            self.stdout.write(f'{mode:<12} {clients:>4} clients  no successful requests ({errors} errors)')
+            return
+        acquire = statistics.quantiles(acquires, n=100)
+        latency = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{mode:<12} {clients:>4} clients  {len(latencies) / elapsed:8.1f} req/s  '
+            f'acquire p50 {acquire[49] * 1000:6.2f} p95 {acquire[94] * 1000:6.2f} p99 {acquire[98] * 1000:6.2f} ms  '
+            f'request p99 {latency[98] * 1000:7.2f} ms  connections {connection_count:>4}  errors {errors}'
+        )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('benchmark_db_pool needs a PostgreSQL database')
+        if 'pooled' in options['modes'] and importlib.util.find_spec('psycopg_pool') is None:
+            raise CommandError('psycopg_pool is not installed (pip install "psycopg[pool]"), needed for pooled')
+        if min(options['workers'], options['pool_size'], options['queries'], *options['multipliers']) <= 0 or options['duration'] <= 0:
+            raise CommandError('--workers, --multipliers, --pool-size, --queries and --duration must be positive')
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SHOW max_connections')
+            max_connections = cursor.fetchone()[0]
+        self.stdout.write(
+            f'{options["workers"]} workers, pool size {options["pool_size"]}, {options["queries"]} queries and '
+            f'{options["hold_ms"]:g} ms per request, {options["duration"]:g}s per run, max_connections {max_connections}'
+        )
+        for mode in options['modes']:
+            database = get_database(mode, options['pool_size'])
+            for multiplier in options['multipliers']:
+                result = self.run(database, options['workers'], multiplier, options)
+                self.report(mode, options['workers'] * multiplier, *result)
@@ -0,0 +1,45 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.module_loading import import_string
+from main_app.models import Event
+
+# Compare the search backends on the events currently in the database, e.g.
+#   python manage.py benchmark_search --term party --term "manama music" --iterations 50
+class Command(BaseCommand):
+    help = 'Benchmark the event search backends against the current Event table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', action='append', dest='terms', help='Search term (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--backend', action='append', dest='backends',
+            help='Dotted path of a backend to include (defaults to every backend usable on this database)',
+        )
+
+    def handle(self, *args, **options):
+        terms = options['terms'] or ['party', 'conf', 'music festival']
+        backends = options['backends'] or ['main_app.search.SimpleSearchBackend']
+        if not options['backends'] and connection.vendor == 'postgresql':
+            backends.append('main_app.search.PostgresSearchBackend')
+        iterations = options['iterations']
+        if iterations <= 0:
+            raise CommandError('--iterations must be positive')
+
+        self.stdout.write(f'{Event.objects.count()} events, {iterations} iterations per term ({connection.vendor})')
+        for path in backends:
+            backend = import_string(path)()
+            for term in terms:
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    queryset = backend.order_by_relevance(backend.search(Event.objects.all(), term))
+                    rows = len(list(queryset.values_list('id', flat=True)[:50]))
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f'{path.rsplit(".", 1)[-1]:<24} {term!r:<20} rows={rows:<4} '
+                    f'mean={statistics.mean(timings):.2f}ms p50={statistics.median(timings):.2f}ms p95={p95:.2f}ms'
+                )
@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from main_app.models import Event
+from main_app.renderers import FastJSONRenderer, orjson
+from main_app.serializers import EventSerializer
+
+User = get_user_model()
+
+# Rows per second of the event list response, serialization and JSON rendering, with the
+# generic ListSerializer + DRF's JSONRenderer (before) and EventListSerializer +
+# FastJSONRenderer (after). Events are built in memory, no database access, e.g.
+#   python manage.py benchmark_serialization --rows 10000 --repeat 5
+class Command(BaseCommand):
+    help = 'Benchmark event list serialization and JSON rendering before/after the fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best one is reported')
+        parser.add_argument('--fields', default='', help='Optional ?fields= selection, e.g. id,title,date,location')
+
+    def build_events(self, rows):
+        creators = [
+            User(pk=i, username=f'user{i}', email=f'user{i}@example.com', first_name='First', last_name='Last',
+                 date_joined=datetime(2025, 1, 1, 12, 0))
+            for i in range(1, 101)
+        ]
+        start = datetime(2026, 1, 1, 18, 30)
+        events = []
+        for i in range(rows):
+            creator = creators[i % len(creators)]
+            event = Event(
+                pk=i + 1, title=f'Event {i}', description='An event description ' * 4, location='Manama',
+                date=start + timedelta(hours=i), created_by=creator, attendee_count=i % 50, confirmed_count=i % 20,
+            )
+            event.user_confirmed = (None, False, True)[i % 3] # As annotated by with_attendance()
+            events.append(event)
+        return events
+
+    def best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows <= 0 or repeat <= 0:
+            raise CommandError('--rows and --repeat must be positive')
+        query = f'?fields={options["fields"]}' if options['fields'] else ''
+        request = Request(APIRequestFactory().get(f'/api/events/{query}'))
+        request.user = User(pk=1, username='user1')
+        events = self.build_events(rows)
+
+        def serializer():
+            return EventSerializer(events, many=True, context={'request': request})
+
+        before_serialize, before_data = self.best(
+            repeat, lambda: serializers.ListSerializer.to_representation(serializer(), events)
+        )
+        before_render, _ = self.best(repeat, lambda: JSONRenderer().render(before_data))
+        after_serialize, after_data = self.best(repeat, lambda: serializer().to_representation(events))
+        after_render, _ = self.best(repeat, lambda: FastJSONRenderer().render(after_data))
+        if after_data != before_data:
+            raise CommandError('The fast path output differs from the generic serializer output')
+
+        self.stdout.write(f'{rows} events, best of {repeat}, orjson {"installed" if orjson else "NOT installed"}')
+        for label, serialize, render in (
+            ('before', before_serialize, before_render),
+            ('after', after_serialize, after_render),
+        ):
+            self.stdout.write(
+                f'{label:<7} serialize {rows / serialize:10.0f} rows/s  render {rows / render:10.0f} rows/s  '
+                f'total {rows / (serialize + render):10.0f} rows/s'
+            )
+        self.stdout.write(f'speedup {(before_serialize + before_render) / (after_serialize + after_render):.1f}x')
@@ -0,0 +1,155 @@
+import http.client
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from main_app.models import Event
+
+User = get_user_model()
+
+# Start the project under each server and hit the read endpoints with concurrent keep-alive
+# clients, e.g. `python manage.py benchmark_servers --concurrency 64 --duration 15`
+#   wsgi        gunicorn, sync views
+#   asgi-sync   uvicorn, sync views (every request goes through sync_to_async)
+#   asgi-async  uvicorn, native async views (ASYNC_VIEWS=True)
+# Runs against the configured database, which should hold representative data. The clients
+# are threads of this process: use fewer workers than cores so they are not the bottleneck.
+# The requests are made as --username, or as a temporary user deleted at the end.
+TARGETS = {
+    'wsgi': ('gunicorn', False),
+    'asgi-sync': ('uvicorn', False),
+    'asgi-async': ('uvicorn', True),
+}
+
+class Command(BaseCommand):
+    help = 'Compare WSGI (gunicorn) and ASGI (uvicorn) throughput and tail latency on the read endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per target')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--username', help='Existing user the requests are authenticated as (default: a temporary user, deleted afterwards)')
+
+    def get_paths(self):
+        paths = ['/api/events/?page_size=20', '/api/events/my-events/?page_size=20', '/api/stats/user/']
+        event = Event.objects.order_by('-date').first()
+        if event is not None:
+            paths.append(f'/api/events/{event.pk}/')
+        return paths
+
+    def start_server(self, server, async_views, port, workers):
+        env = dict(os.environ, ASYNC_VIEWS=str(async_views))
+        if server == 'gunicorn':
+            command = ['gunicorn', 'Event_Planner_Project.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                       '--workers', str(workers)]
+        else:
+            command = ['uvicorn', 'Event_Planner_Project.asgi:application', '--port', str(port),
+                       '--workers', str(workers), '--no-access-log', '--log-level', 'warning']
+        process = subprocess.Popen([sys.executable, '-m', *command], env=env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'{server} exited with status {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'{server} did not start listening on port {port}')
+
+    def run_clients(self, port, paths, token, concurrency, duration):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        headers = {'Authorization': f'Bearer {token}'}
+        deadline = time.perf_counter() + duration
+
+        def client(offset):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            timings, failed, i = [], 0, offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        failed += 1
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    continue
+                timings.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                latencies.extend(timings)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0], time.perf_counter() - start
+
+    def report(self, target, latencies, errors, elapsed):
+        if len(latencies) < 2:
+            self.stdout.write(f'{target:<11} no successful requests ({errors} errors)')
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{target:<11} {len(latencies) / elapsed:8.1f} req/s  '
+            f'p50 {cuts[49] * 1000:7.1f} ms  p95 {cuts[94] * 1000:7.1f} ms  p99 {cuts[98] * 1000:7.1f} ms  '
+            f'errors {errors}'
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] <= 0 or options['duration'] <= 0 or options['workers'] <= 0:
+            raise CommandError('--concurrency, --duration and --workers must be positive')
+        for target in options['targets']:
+            server = TARGETS[target][0]
+            if importlib.util.find_spec(server) is None:
+                raise CommandError(f'{server} is not installed (needed for {target})')
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'No user named {options["username"]}')
+            self.benchmark(user, options)
+            return
+        name = f'benchmark-{uuid.uuid4().hex[:12]}'
+        user = User.objects.create_user(username=name, email=f'{name}@example.com')
+        try:
+            self.benchmark(user, options)
+        finally:
+            user.delete()
+
+    def benchmark(self, user, options):
+        token = str(AccessToken.for_user(user))
+        paths = self.get_paths()
+        self.stdout.write(f'{options["concurrency"]} clients, {options["duration"]:g}s per target, paths: {", ".join(paths)}')
+        for target in options['targets']:
+            server, async_views = TARGETS[target]
+            process = self.start_server(server, async_views, options['port'], options['workers'])
+            try:
+                # Warm up the workers (connections, caches) before measuring
+                self.run_clients(options['port'], paths, token, options['concurrency'], 1)
+                self.report(target, *self.run_clients(
+                    options['port'], paths, token, options['concurrency'], options['duration']
+                ))
+            finally:
+                process.terminate()
+                process.wait()
@@ -0,0 +1,62 @@
+import time
+import uuid
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+# Sign-in throughput of the previous two-step flow (username, then email lookup and a
+# second authenticate) against UsernameOrEmailBackend. Creates a throwaway user, e.g.
+#   python manage.py benchmark_signin --iterations 10
+class Command(BaseCommand):
+    help = 'Benchmark sign-in throughput before/after the username-or-email backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5)
+
+    # The sign-in flow of UserSigninSerializer before UsernameOrEmailBackend
+    def legacy_signin(self, username_or_email, password):
+        backend = ModelBackend()
+        user = backend.authenticate(None, username=username_or_email, password=password)
+        if user is None and '@' in username_or_email:
+            try:
+                user_obj = User.objects.get(email__iexact=username_or_email)
+                user = backend.authenticate(None, username=user_obj.username, password=password)
+            except User.DoesNotExist:
+                pass
+        return user
+
+    def current_signin(self, username_or_email, password):
+        return authenticate(None, username=username_or_email, password=password)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations <= 0:
+            raise CommandError('--iterations must be positive')
+        name = f'bench-{uuid.uuid4().hex[:12]}'
+        password = f'Bench-{uuid.uuid4().hex}!A'
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password=password)
+        scenarios = [
+            ('username', name, password),
+            ('email', f'{name.upper()}@example.com', password),
+            ('wrong password', f'{name}@example.com', 'wrong'),
+            ('unknown email', f'nobody-{name}@example.com', password),
+        ]
+        try:
+            for label, flow in (('before', self.legacy_signin), ('after', self.current_signin)):
+                for scenario, identifier, secret in scenarios:
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        for _ in range(iterations):
+                            flow(identifier, secret)
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'{label:<7} {scenario:<15} {iterations / elapsed:8.2f} sign-ins/s '
+                        f'{elapsed / iterations * 1000:8.1f} ms each '
+                        f'{len(queries) / iterations:4.1f} queries each'
+                    )
+        finally:
+            user.delete()
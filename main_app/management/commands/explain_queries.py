@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from main_app.models import Event, Attendee
+
+# Run EXPLAIN on the hot queries of the API and check that each one uses the index
+# that was added for it, e.g. `python manage.py explain_queries --check`
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot event/attendee queries and report which index each one uses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Exit with an error if an expected index is not used')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full query plans')
+
+    def get_queries(self):
+        # Fixed ids/dates: only the plan matters, the rows do not need to exist
+        now = timezone.now().replace(microsecond=0)
+        day = now.replace(hour=0, minute=0, second=0)
+        return [
+            ('event list', 'event_date_id_idx', Event.objects.order_by('-date', 'id')[:20]),
+            ('event list by day', 'event_date_id_idx',
+             Event.objects.filter(date__gte=day, date__lt=day + timedelta(days=1)).order_by('-date', 'id')),
+            ('my events', 'event_creator_date_idx', Event.objects.filter(created_by_id=1).order_by('-date')),
+            ('event attendees', 'attendee_event_confirmed_idx',
+             Attendee.objects.filter(event_id=1, confirmed=True).order_by('id')[:100]),
+            ('event confirmed count', 'attendee_event_confirmed_idx',
+             Attendee.objects.filter(event_id=1, confirmed=True).values('id')),
+            ('user confirmed count', 'attendee_user_confirmed_idx',
+             Attendee.objects.filter(user_id=1, confirmed=True).values('id')),
+        ]
+
+    def handle(self, *args, **options):
+        missing = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables are always sequentially scanned, ask whether the index is usable at all
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, index, queryset in self.get_queries():
+                plan = queryset.explain()
+                used = index in plan
+                if not used:
+                    missing.append(name)
+                self.stdout.write(f'{name:<24} {index:<30} {"used" if used else "NOT USED"}')
+                if options['verbose_plans'] or not used:
+                    self.stdout.write(plan)
+        if missing and options['check']:
+            raise CommandError(f'Expected index not used for: {", ".join(missing)}')
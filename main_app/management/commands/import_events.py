@@ -0,0 +1,43 @@
+import os
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from main_app import transfer
+
+User = get_user_model()
+
+# Create events from an NDJSON or CSV file (e.g. the output of export_events), validated
+# with the EventSerializer rules and inserted in batches, e.g.
+#   python manage.py import_events events.csv --user alice --batch-size 2000
+class Command(BaseCommand):
+    help = 'Import events from NDJSON or CSV and report the throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Input file, - for stdin')
+        parser.add_argument('--user', required=True, help='Username of the creator of the imported events')
+        parser.add_argument('--input', choices=transfer.FORMATS, help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+        path = options['file']
+        input_format = options['input']
+        if input_format is None:
+            input_format = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson'
+        source = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        try:
+            result = transfer.import_events(transfer.parse(source, input_format), user, options['batch_size'])
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        for error in result['errors']:
+            self.stderr.write(f'line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result["created"]} events, skipped {result["invalid"]} invalid rows '
+            f'in {result["seconds"]:.2f}s ({result["rows_per_second"]:.0f} rows/s)'
+        ))
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+# Delete the expired outstanding tokens (and their blacklist rows, by cascade) in small
+# batches, each in its own short transaction, so the token tables are never locked for
+# long while refreshes keep running, e.g.
+#   python manage.py prune_tokens --batch-size 5000 --pause 0.1
+class Command(BaseCommand):
+    help = 'Delete expired simplejwt outstanding/blacklisted tokens in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+        now = timezone.now()
+        deleted = 0
+        while True:
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lt=now)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired tokens'))
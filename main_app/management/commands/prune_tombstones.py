@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from main_app.models import Tombstone
+
+# Delete the change feed tombstones older than CHANGES_RETENTION_DAYS (or --days) in small
+# batches. Clients whose cursor is older get a 410 and sync again from scratch, e.g.
+#   python manage.py prune_tombstones --days 30 --batch-size 5000
+class Command(BaseCommand):
+    help = 'Delete change feed tombstones past their retention in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention (default: CHANGES_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        days = settings.CHANGES_RETENTION_DAYS if options['days'] is None else options['days']
+        batch_size = options['batch_size']
+        if batch_size <= 0 or days < 0:
+            raise CommandError('--batch-size must be positive and --days not negative')
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff)
+                .order_by('deleted_at', 'pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            Tombstone.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones older than {days} days'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Q
+from main_app.attendance import refresh_counters
+from main_app.models import Event
+
+# Recompute the denormalized attendee counters of the events whose stored values drifted
+# from the attendee rows, scanning the table in primary key batches, e.g.
+#   python manage.py repair_event_counters --batch-size 2000
+class Command(BaseCommand):
+    help = 'Find and fix events whose attendee/confirmed counters drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drifted events')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+        last_id, scanned, repaired = 0, 0, 0
+        while True:
+            batch = list(
+                Event.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            scanned += len(batch)
+            drifted = list(
+                Event.objects.filter(pk__in=batch)
+                .order_by()
+                .annotate(
+                    actual_attendees=Count('attendees'),
+                    actual_confirmed=Count('attendees', filter=Q(attendees__confirmed=True)),
+                )
+                .exclude(attendee_count=F('actual_attendees'), confirmed_count=F('actual_confirmed'))
+                .values_list('pk', flat=True)
+            )
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    refresh_counters(Event.objects.filter(pk__in=drifted))
+            repaired += len(drifted)
+            if drifted:
+                self.stdout.write(f'Events with drifted counters: {drifted}')
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} events, {action} {repaired} drifted'))
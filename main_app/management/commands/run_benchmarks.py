@@ -0,0 +1,316 @@
+import json
+import platform
+import statistics
+import time
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from main_app.models import Event, Attendee
+from main_app.tokens import CachedBlacklistRefreshToken
+
+User = get_user_model()
+
+# Replay scripted scenarios against the routes of main_app/urls.py (by URL name) in process
+# with Django's test client, on the configured database (SQLite works, see seed_data), e.g.
+#   python manage.py seed_data --users 1000 --events 5000
+#   python manage.py run_benchmarks --output baseline.json
+#   python manage.py run_benchmarks --baseline baseline.json --output current.json
+# Reports p50/p95/p99 latency, throughput and SQL queries per request for every scenario.
+# With --baseline, a scenario whose p95 grew by more than --tolerance or which runs more
+# queries per request than in the baseline is a regression and the command fails. The read
+# scenarios are warmed up (--warmup requests) before they are measured.
+# The write scenarios undo their changes (attend then cancel, create then delete).
+SCENARIOS = [
+    # (name, URL name, method, max iterations or None)
+    ('event-list', 'event-list', 'get_event_list', None),
+    ('event-list-page', 'event-list', 'get_event_list_page', None),
+    ('event-list-search', 'event-list', 'get_event_list_search', None),
+    ('event-list-date', 'event-list', 'get_event_list_date', None),
+    ('event-list-range', 'event-list', 'get_event_list_range', None),
+    ('event-calendar', 'event-calendar', 'get_event_calendar', None),
+    ('event-detail', 'event-detail', 'get_event_detail', None),
+    ('my-events', 'my-events', 'get_my_events', None),
+    ('my-attending-events', 'my-attending-events', 'get_my_attending', None),
+    ('event-attendees', 'event-attendees', 'get_event_attendees', None),
+    ('event-attendees-compact', 'event-attendees', 'get_event_attendees_compact', None),
+    ('event-attend', 'event-attend', 'post_attend', None),
+    ('event-confirm-attendance', 'event-confirm-attendance', 'post_confirm', None),
+    ('event-decline-attendance', 'event-decline-attendance', 'post_decline', None),
+    ('event-cancel-attendance', 'event-cancel-attendance', 'post_cancel', None),
+    ('event-create', 'event-create', 'post_create', None),
+    ('event-update', 'event-update', 'put_update', None),
+    ('event-delete', 'event-delete', 'delete_event', None),
+    ('user-stats', 'user-stats', 'get_user_stats', None),
+    ('user-profile', 'user-profile', 'get_user_profile', None),
+    ('token_refresh', 'token_refresh', 'post_token_refresh', None),
+    ('user-signin', 'user-signin', 'post_signin', 10), # Dominated by password hashing
+]
+SEARCH_TERMS = ['music', 'tech meetup', 'party', 'manama', 'festival night']
+
+class Command(BaseCommand):
+    help = 'Benchmark every main_app route and compare the results with a saved baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests before each read scenario')
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=[s[0] for s in SCENARIOS],
+                            help='Scenario to run (repeatable, default: all)')
+        parser.add_argument('--username', help='User the requests are made as (default: the seeded user with the most events)')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the seeded users')
+        parser.add_argument('--password', default='Seed-Passw0rd!', help='Password of the user (sign-in scenario)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative p95 growth (default 25%%)')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help='p95 growth below this is never a regression')
+
+    # ---------------- setup ----------------
+    def get_user(self, options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = (
+                User.objects.filter(username__startswith=f'{options["prefix"]}-')
+                .annotate(total=Count('created_events')).order_by('-total', 'pk').first()
+            )
+        if user is None:
+            raise CommandError('No user to benchmark with, run seed_data first or pass --username')
+        return user
+
+    def setup(self, user, options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        self.user, self.password = user, options['password']
+        self.client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.refresh_token = str(CachedBlacklistRefreshToken.for_user(user))
+        # Popular events for the reads, events the user does not attend for the attendance writes
+        self.popular = list(Event.objects.order_by('-attendee_count', 'pk').values_list('pk', flat=True)[:20])
+        if not self.popular:
+            raise CommandError('There are no events, run seed_data first')
+        self.not_attending = list(
+            Event.objects.exclude(attendees__user=user).order_by('pk').values_list('pk', flat=True)[:options['iterations']]
+        )
+        self.today = timezone.now().date().isoformat()
+        self.month_end = (timezone.now().date() + timedelta(days=30)).isoformat()
+        self.created = []
+
+    def pick(self, items, i):
+        return items[i % len(items)]
+
+    # ---------------- scenarios ----------------
+    def get_event_list(self, i):
+        return self.client.get(reverse('event-list'))
+
+    def get_event_list_page(self, i):
+        return self.client.get(reverse('event-list'), {'page_size': 20})
+
+    def get_event_list_search(self, i):
+        return self.client.get(reverse('event-list'), {'search': self.pick(SEARCH_TERMS, i), 'page_size': 20})
+
+    def get_event_list_date(self, i):
+        return self.client.get(reverse('event-list'), {'date': self.today})
+
+    def get_event_list_range(self, i):
+        return self.client.get(reverse('event-list'), {'from': self.today, 'to': self.month_end})
+
+    def get_event_calendar(self, i):
+        return self.client.get(reverse('event-calendar'), {'from': self.today, 'to': self.month_end, 'flags': 'true'})
+
+    def get_event_detail(self, i):
+        return self.client.get(reverse('event-detail', args=[self.pick(self.popular, i)]))
+
+    def get_my_events(self, i):
+        return self.client.get(reverse('my-events'))
+
+    def get_my_attending(self, i):
+        return self.client.get(reverse('my-attending-events'))
+
+    def get_event_attendees(self, i):
+        return self.client.get(reverse('event-attendees', args=[self.pick(self.popular, i)]))
+
+    def get_event_attendees_compact(self, i):
+        return self.client.get(reverse('event-attendees', args=[self.pick(self.popular, i)]), {'compact': 'true'})
+
+    def attendance_event(self, i):
+        if i >= len(self.not_attending):
+            return None
+        return self.not_attending[i]
+
+    def post_attend(self, i):
+        event_id = self.attendance_event(i)
+        return event_id and self.client.post(reverse('event-attend', args=[event_id]))
+
+    def post_confirm(self, i):
+        event_id = self.attendance_event(i)
+        return event_id and self.client.post(reverse('event-confirm-attendance', args=[event_id]))
+
+    def post_decline(self, i):
+        event_id = self.attendance_event(i)
+        return event_id and self.client.post(reverse('event-decline-attendance', args=[event_id]))
+
+    def post_cancel(self, i):
+        event_id = self.attendance_event(i)
+        return event_id and self.client.post(reverse('event-cancel-attendance', args=[event_id]))
+
+    def post_create(self, i):
+        response = self.client.post(reverse('event-create'), {
+            'title': f'Benchmark event {i}', 'description': 'Created by run_benchmarks',
+            'date': self.today, 'time': '19:00', 'location': 'Manama',
+        }, content_type='application/json')
+        if response.status_code == 201:
+            self.created.append(response.json()['id'])
+        return response
+
+    def put_update(self, i):
+        if i >= len(self.created):
+            return None
+        return self.client.put(reverse('event-update', args=[self.created[i]]),
+                               {'title': f'Benchmark event {i} (updated)'}, content_type='application/json')
+
+    def delete_event(self, i):
+        if i >= len(self.created):
+            return None
+        return self.client.delete(reverse('event-delete', args=[self.created[i]]))
+
+    def get_user_stats(self, i):
+        return self.client.get(reverse('user-stats'))
+
+    def get_user_profile(self, i):
+        return self.client.get(reverse('user-profile'))
+
+    def post_token_refresh(self, i):
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh_token},
+                                    content_type='application/json')
+        if response.status_code == 200:
+            self.refresh_token = response.json().get('refresh', self.refresh_token)
+        return response
+
+    def post_signin(self, i):
+        return self.client.post(reverse('user-signin'), {
+            'username_or_email': self.user.username, 'password': self.password,
+        }, content_type='application/json')
+
+    # ---------------- measurement ----------------
+    # The auth rate limits would reject most of the sign-in and token refresh requests
+    @override_settings(AUTH_THROTTLE=False)
+    def run_scenario(self, method, url_name, iterations, warmup):
+        if method.startswith('get_'):
+            for i in range(warmup):
+                getattr(self, method)(i)
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for i in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(self, method)(i)
+                elapsed = time.perf_counter() - start
+            if response is None:
+                break # Nothing left to act on (e.g. fewer events than iterations)
+            latencies.append(elapsed * 1000)
+            queries.append(len(captured))
+            if response.status_code >= 400:
+                errors += 1
+        total = time.perf_counter() - started
+        if not latencies:
+            return None
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+        return {
+            'url_name': url_name,
+            'requests': len(latencies),
+            'errors': errors,
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'p50_ms': round(cuts[49], 3),
+            'p95_ms': round(cuts[94], 3),
+            'p99_ms': round(cuts[98], 3),
+            'throughput_rps': round(len(latencies) / total, 1),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def compare(self, results, baseline, options):
+        regressions = []
+        self.stdout.write(f'\n{"scenario":<26} {"p95 base":>9} {"p95 now":>9} {"change":>8} {"queries/request":>16}')
+        for name, current in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            change = (current['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0
+            slower = change > options['tolerance'] and current['p95_ms'] - base['p95_ms'] > options['min_delta_ms']
+            # Half a query of margin: an occasional cache miss is not an N+1
+            more_queries = current['queries_mean'] > base['queries_mean'] + 0.5
+            flag = ' REGRESSION' if slower or more_queries else ''
+            self.stdout.write(
+                f'{name:<26} {base["p95_ms"]:9.2f} {current["p95_ms"]:9.2f} {change:+8.0%} '
+                f'{base["queries_mean"]:>5} -> {current["queries_mean"]:<5}{flag}'
+            )
+            if slower:
+                regressions.append(f'{name}: p95 {base["p95_ms"]:.2f}ms -> {current["p95_ms"]:.2f}ms')
+            if more_queries:
+                regressions.append(f'{name}: queries per request {base["queries_mean"]} -> {current["queries_mean"]}')
+        return regressions
+
+    def handle(self, *args, **options):
+        if options['iterations'] <= 0 or options['warmup'] < 0:
+            raise CommandError('--iterations must be positive and --warmup not negative')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)['scenarios']
+        user = self.get_user(options)
+        self.setup(user, options)
+        selected = options['scenarios']
+        self.stdout.write(
+            f'{connection.vendor}: {User.objects.count()} users, {Event.objects.count()} events, '
+            f'{Attendee.objects.count()} attendances, as {user.username}'
+        )
+        self.stdout.write(f'{"scenario":<26} {"reqs":>5} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>8} {"queries":>8} {"errors":>6}')
+        results = {}
+        for name, url_name, method, max_iterations in SCENARIOS:
+            if selected and name not in selected:
+                continue
+            iterations = min(options['iterations'], max_iterations or options['iterations'])
+            result = self.run_scenario(method, url_name, iterations, options['warmup'])
+            if result is None:
+                self.stdout.write(f'{name:<26} skipped (nothing to run against)')
+                continue
+            results[name] = result
+            self.stdout.write(
+                f'{name:<26} {result["requests"]:>5} {result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} '
+                f'{result["p99_ms"]:9.2f} {result["throughput_rps"]:8.1f} {result["queries_mean"]:8.1f} {result["errors"]:>6}'
+            )
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'iterations': options['iterations'],
+                'user': user.username,
+                'rows': {
+                    'users': User.objects.count(),
+                    'events': Event.objects.count(),
+                    'attendances': Attendee.objects.count(),
+                },
+                'settings': {
+                    name: getattr(settings, name, None)
+                    for name in ('RESPONSE_CACHE', 'USER_STATS_CACHE', 'ASYNC_VIEWS', 'EVENT_PAGE_SIZE')
+                },
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+        if baseline is not None:
+            regressions = self.compare(results, baseline, options)
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regression against the baseline'))
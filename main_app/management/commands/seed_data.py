@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from main_app.attendance import refresh_counters
+from main_app.models import Event, Attendee
+
+User = get_user_model()
+
+WORDS = [
+    'music', 'festival', 'tech', 'meetup', 'conference', 'party', 'workshop', 'charity', 'run', 'art',
+    'food', 'market', 'startup', 'python', 'design', 'book', 'club', 'family', 'summer', 'night',
+]
+LOCATIONS = ['Manama', 'Muharraq', 'Riffa', 'Isa Town', 'Sitra', 'Hamad Town', 'Juffair', 'Seef']
+
+# Seed a synthetic dataset with bulk inserts, reproducible with --seed, e.g.
+#   python manage.py seed_data --users 2000 --events 10000 --attendances 200000
+# Activity is skewed like real traffic: a few users create most of the events and a few
+# events get most of the attendees (Pareto distributed weights). Seeded users share one
+# password (--password) and their usernames start with --prefix, --clear removes them.
+class Command(BaseCommand):
+    help = 'Seed users, events and attendees with realistic skew for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--attendances', type=int, default=50000, help='Attendee rows to create (before duplicates are skipped)')
+        parser.add_argument('--confirmed-ratio', type=float, default=0.6)
+        parser.add_argument('--skew', type=float, default=1.2, help='Pareto shape of the activity weights, lower is more skewed')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='Seed-Passw0rd!')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help='Delete the previously seeded users and their events first')
+
+    def weights(self, rng, count, skew):
+        return [rng.paretovariate(skew) for _ in range(count)]
+
+    def handle(self, *args, **options):
+        for name in ('users', 'events', 'batch_size'):
+            if options[name] <= 0:
+                raise CommandError(f'--{name.replace("_", "-")} must be positive')
+        if options['attendances'] < 0 or not 0 <= options['confirmed_ratio'] <= 1:
+            raise CommandError('--attendances must be >= 0 and --confirmed-ratio between 0 and 1')
+        rng = random.Random(options['seed'])
+        prefix, batch_size = options['prefix'], options['batch_size']
+        start = time.perf_counter()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=f'{prefix}-').delete()
+            self.stdout.write(f'Deleted {deleted} previously seeded rows')
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f'Users starting with "{prefix}-" already exist, use --clear or another --prefix')
+
+        # One hash for every user, hashing each password would dominate the run
+        password = make_password(options['password'])
+        now = timezone.now().replace(second=0, microsecond=0)
+        joined = now - timedelta(days=365)
+        users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password,
+                first_name=rng.choice(WORDS).title(), last_name=rng.choice(WORDS).title(),
+                date_joined=joined + timedelta(minutes=i),
+            )
+            for i in range(options['users'])
+        ], batch_size=batch_size)
+        user_ids = list(User.objects.filter(username__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+        creators = rng.choices(user_ids, self.weights(rng, len(user_ids), options['skew']), k=options['events'])
+        first_id = (Event.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        events = []
+        for i, creator_id in enumerate(creators):
+            words = rng.sample(WORDS, 3)
+            events.append(Event(
+                title=f'{words[0].title()} {words[1]} {i}',
+                description=f'A {words[2]} {words[0]} event with {rng.choice(WORDS)} and {rng.choice(WORDS)}.',
+                location=rng.choice(LOCATIONS),
+                date=now + timedelta(hours=rng.randint(-180 * 24, 180 * 24)),
+                created_by_id=creator_id,
+            ))
+        with transaction.atomic():
+            Event.objects.bulk_create(events, batch_size=batch_size)
+            seeded_events = Event.objects.filter(pk__gte=first_id, created_by__username__startswith=f'{prefix}-')
+            seeded_events.update_search_vector()
+        event_ids = list(seeded_events.values_list('pk', flat=True))
+
+        event_weights = self.weights(rng, len(event_ids), options['skew'])
+        user_weights = self.weights(rng, len(user_ids), options['skew'])
+        remaining = options['attendances']
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            remaining -= count
+            attendees = [
+                Attendee(user_id=user_id, event_id=event_id, confirmed=rng.random() < options['confirmed_ratio'])
+                for event_id, user_id in zip(
+                    rng.choices(event_ids, event_weights, k=count), rng.choices(user_ids, user_weights, k=count)
+                )
+            ]
+            # The same (user, event) pair drawn twice is skipped by the unique constraint
+            Attendee.objects.bulk_create(attendees, ignore_conflicts=True)
+        with transaction.atomic():
+            refresh_counters(seeded_events)
+        attendances = Attendee.objects.filter(event__in=seeded_events).count()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(event_ids)} events and {attendances} attendances '
+            f'in {elapsed:.1f}s (prefix "{prefix}", password "{options["password"]}")'
+        ))
@@ -0,0 +1,279 @@
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# ================ METRICS REGISTRY ================
+# Per-process counters, updated under a lock (a few dict operations per request):
+#   - requests by URL name, method and status code
+#   - request latency histograms and database time/queries by URL name
+#   - cache hits/misses by cache (record_cache() is called by the caches themselves)
+# With settings.METRICS_DIR every worker process writes its registry to
+# METRICS_DIR/<pid>-<random id>.json at most every METRICS_FLUSH_INTERVAL seconds (and on exit),
+# and the metrics endpoint adds up the files of all the workers. The random id keeps a worker
+# that gets the PID of a dead one from overwriting its counters. When a worker exits, gunicorn's
+# child_exit hook (gunicorn.conf.py) adds its file to METRICS_DIR/archive.json and removes it,
+# so the totals never go backwards and the files do not pile up as workers are recycled. Under
+# other servers the files of stopped workers are kept: empty the directory on (re)start.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED = '<unresolved>' # Requests that matched no URL
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {} # (view, method, status) -> count
+        self.latency = {} # view -> [count per bucket..., count above the last bucket, sum]
+        self.db = {} # view -> [seconds, queries]
+        self.cache = {} # (cache, 'hit'|'miss') -> count
+        self.last_flush = time.monotonic()
+
+    def record_request(self, view, method, status, seconds, db_seconds, queries):
+        bucket = bisect_left(BUCKETS, seconds)
+        with self.lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            latency = self.latency.get(view)
+            if latency is None:
+                latency = self.latency[view] = [0] * (len(BUCKETS) + 1) + [0.0]
+            latency[bucket] += 1
+            latency[-1] += seconds
+            db = self.db.get(view)
+            if db is None:
+                db = self.db[view] = [0.0, 0]
+            db[0] += db_seconds
+            db[1] += queries
+
+    def record_cache(self, name, hit):
+        key = (name, 'hit' if hit else 'miss')
+        with self.lock:
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': [[*key, count] for key, count in self.requests.items()],
+                'latency': [[view, list(values)] for view, values in self.latency.items()],
+                'db': [[view, list(values)] for view, values in self.db.items()],
+                'cache': [[*key, count] for key, count in self.cache.items()],
+            }
+
+registry = Registry()
+
+def record_cache(name, hit):
+    registry.record_cache(name, hit)
+
+ARCHIVE = 'archive.json'
+ARCHIVE_MERGED_NAMES = 1000 # Names of the merged worker files kept in the archive
+_worker_file = (None, None) # (pid, file name), a new name in every (forked) process
+
+def _own_path():
+    global _worker_file
+    pid = os.getpid()
+    if _worker_file[0] != pid:
+        _worker_file = (pid, f'{pid}-{uuid.uuid4().hex[:12]}.json')
+    return Path(settings.METRICS_DIR) / _worker_file[1]
+
+def _write(path, data):
+    tmp = Path(f'{path}.{threading.get_ident()}.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path) # Readers never see a partial file
+
+def flush():
+    if not (settings.METRICS_ENABLED and settings.METRICS_DIR):
+        return
+    if not (registry.requests or registry.cache):
+        return # Served nothing (e.g. gunicorn's master process)
+    registry.last_flush = time.monotonic()
+    _write(_own_path(), registry.snapshot())
+
+def _maybe_flush():
+    if settings.METRICS_DIR and time.monotonic() - registry.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+atexit.register(flush)
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None # Removed or being replaced
+
+def merge(snapshots):
+    requests, latency, db, cache = {}, {}, {}, {}
+    for snapshot in snapshots:
+        for *key, count in snapshot['requests']:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + count
+        for view, values in snapshot['latency']:
+            totals = latency.get(view, [0] * len(values))
+            latency[view] = [total + value for total, value in zip(totals, values)]
+        for view, values in snapshot['db']:
+            totals = db.get(view, [0.0, 0])
+            db[view] = [total + value for total, value in zip(totals, values)]
+        for *key, count in snapshot['cache']:
+            cache[tuple(key)] = cache.get(tuple(key), 0) + count
+    return {
+        'requests': [[*key, count] for key, count in requests.items()],
+        'latency': [[view, values] for view, values in latency.items()],
+        'db': [[view, values] for view, values in db.items()],
+        'cache': [[*key, count] for key, count in cache.items()],
+    }
+
+# Called by gunicorn's master process (child_exit hook) once the worker `pid` has exited: adds
+# its file to the archive, then removes it. The archive lists the names it merged so that a
+# concurrent collect() that still read the worker's file does not count it twice.
+def archive_worker(pid):
+    if not (settings.METRICS_ENABLED and settings.METRICS_DIR):
+        return
+    directory = Path(settings.METRICS_DIR)
+    workers = [(path, _read(path)) for path in directory.glob(f'{pid}-*.json')]
+    workers = [(path, snapshot) for path, snapshot in workers if snapshot is not None]
+    if not workers:
+        return
+    archive = _read(directory / ARCHIVE) or {'requests': [], 'latency': [], 'db': [], 'cache': [], 'merged': []}
+    merged = merge([archive, *(snapshot for _, snapshot in workers)])
+    merged['merged'] = (archive['merged'] + [path.name for path, _ in workers])[-ARCHIVE_MERGED_NAMES:]
+    _write(directory / ARCHIVE, merged)
+    for path, _ in workers:
+        path.unlink(missing_ok=True)
+
+# Snapshots of every worker: this process' live registry, the files of the others and the
+# archive of the exited ones
+def collect():
+    snapshots = [registry.snapshot()]
+    if settings.METRICS_DIR:
+        directory = Path(settings.METRICS_DIR)
+        own = _own_path()
+        # Worker files first: one merged into the archive in between is then listed in it
+        files = {path.name: _read(path) for path in directory.glob('*.json') if path != own and path.name != ARCHIVE}
+        archive = _read(directory / ARCHIVE)
+        if archive is not None:
+            snapshots.append(archive)
+            for name in archive['merged']:
+                files.pop(name, None)
+        snapshots += [snapshot for snapshot in files.values() if snapshot is not None]
+    return snapshots
+# ================ END OF METRICS REGISTRY ================
+
+# ================ DATABASE TIME ================
+# Execute wrapper installed once on every database connection (connection_created signal,
+# connected by MainAppConfig.ready() when settings.METRICS_ENABLED), adds the duration of every
+# query to the current request's [seconds, queries] (a context variable, set by the middleware;
+# sync_to_async copies it to the worker threads of the async views).
+_db_time = contextvars.ContextVar('db_time', default=None)
+
+def _db_wrapper(execute, sql, params, many, context):
+    current = _db_time.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current[0] += time.perf_counter() - start
+        current[1] += 1
+
+def install_db_wrapper(sender, connection, **kwargs):
+    # connection_created is sent on every reconnect of the same wrapper. First in the list: the
+    # execute_wrapper() context managers (e.g. QueryRecorder) pop the last one on exit.
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _db_wrapper)
+# ================ END OF DATABASE TIME ================
+
+# ================ METRICS MIDDLEWARE ================
+# Installed when settings.METRICS_ENABLED, sync and async so ASGI requests stay in the event loop
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        db = [0.0, 0]
+        token = _db_time.set(db)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _db_time.reset(token)
+        self.record(request, response, time.perf_counter() - start, db)
+        return response
+
+    async def __acall__(self, request):
+        db = [0.0, 0]
+        token = _db_time.set(db)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _db_time.reset(token)
+        self.record(request, response, time.perf_counter() - start, db)
+        return response
+
+    def record(self, request, response, seconds, db):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        registry.record_request(view, request.method, response.status_code, seconds, db[0], db[1])
+        _maybe_flush()
+# ================ END OF METRICS MIDDLEWARE ================
+
+# ================ PROMETHEUS TEXT FORMAT ================
+def _labels(**labels):
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+
+def render_prometheus(snapshots):
+    totals = merge(snapshots)
+    requests = {tuple(key): count for *key, count in totals['requests']}
+    latency = dict(totals['latency'])
+    db = dict(totals['db'])
+    caches = {tuple(key): count for *key, count in totals['cache']}
+
+    lines = [
+        '# HELP http_requests_total Requests by URL name, method and status code.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(requests.items()):
+        lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by URL name.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for view, values in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), values[:-1]):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(view=view, le=bound)} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(view=view)} {values[-1]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{_labels(view=view)} {cumulative}')
+    lines += [
+        '# HELP db_query_duration_seconds_total Time spent in database queries by URL name.',
+        '# TYPE db_query_duration_seconds_total counter',
+    ]
+    lines += [f'db_query_duration_seconds_total{_labels(view=view)} {seconds:.6f}' for view, (seconds, _) in sorted(db.items())]
+    lines += [
+        '# HELP db_queries_total Database queries by URL name.',
+        '# TYPE db_queries_total counter',
+    ]
+    lines += [f'db_queries_total{_labels(view=view)} {queries}' for view, (_, queries) in sorted(db.items())]
+    lines += [
+        '# HELP cache_requests_total Cache lookups by cache and result (hit/miss).',
+        '# TYPE cache_requests_total counter',
+    ]
+    lines += [f'cache_requests_total{_labels(cache=name, result=result)} {count}' for (name, result), count in sorted(caches.items())]
+    return '\n'.join(lines) + '\n'
+# ================ END OF PROMETHEUS TEXT FORMAT ================
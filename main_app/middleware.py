@@ -0,0 +1,124 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('main_app.queries')
+
+# ================ SQL QUERY RECORDER ================
+# Execute wrapper (connection.execute_wrapper) that records every query run while it is
+# installed. Queries are grouped by fingerprint: the SQL with its parameters (already %s
+# placeholders) and the lists of IN (...) placeholders collapsed, so the same query run for
+# every row of a result shows up as one fingerprint with a high count.
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+def fingerprint(sql):
+    return _IN_LIST.sub('IN (...)', sql)
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = [] # (fingerprint, duration in seconds)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((fingerprint(sql), time.perf_counter() - start))
+
+    def record(self, using=None):
+        # Context manager installing the recorder on every (or one) database connection
+        stack = ExitStack()
+        for alias in ([using] if using else connections):
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    # Fingerprints run at least `threshold` times, most repeated first
+    def duplicates(self, threshold=2):
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+# ================ END OF SQL QUERY RECORDER ================
+
+# ================ QUERY INSTRUMENTATION MIDDLEWARE ================
+# Opt-in (settings.QUERY_INSTRUMENTATION). For every request: the query count, the time spent
+# in the database and the repeated query fingerprints, returned in a Server-Timing header and
+# logged as one JSON line on the `main_app.queries` logger. The query count of every view is
+# also compared across result sizes: a view whose count grows with the number of rows it
+# returns runs queries per row (N+1) and is logged as a warning.
+# Sync only, under ASGI Django runs it in a thread (it is meant for debugging/staging).
+def result_size(response):
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        data = data['results']
+    return len(data) if isinstance(data, list) else None
+
+class QueryInstrumentationMiddleware:
+    # Query counts seen per view and result size, shared by the requests of the process
+    samples = {}
+    flagged = set()
+    lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        db_ms, total_ms = recorder.duration * 1000, total * 1000
+        duplicates = recorder.duplicates(settings.QUERY_DUPLICATE_THRESHOLD)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else None
+        size = result_size(response)
+        n_plus_one = self.check_growth(view, size, recorder.count)
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.2f};desc="{recorder.count} queries, {len(duplicates)} repeated", '
+            f'total;dur={total_ms:.2f}'
+        )
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(total_ms, 2),
+            'result_size': size,
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates],
+            'n_plus_one': n_plus_one,
+        }
+        logger.log(logging.WARNING if n_plus_one else logging.INFO, json.dumps(line))
+        return response
+
+    # True when this view ran more queries for a larger result than for a smaller one
+    def check_growth(self, view, size, count):
+        if view is None or size is None:
+            return False
+        with self.lock:
+            counts = self.samples.setdefault(view, {})
+            if size not in counts and len(counts) >= 32:
+                counts.pop(next(iter(counts))) # Keep a few sizes per view
+            counts[size] = min(count, counts.get(size, count))
+            grows = any(
+                (other < size and other_count < count) or (other > size and other_count > count)
+                for other, other_count in counts.items()
+            )
+            if grows:
+                self.flagged.add(view)
+            return grows
+# ================ END OF QUERY INSTRUMENTATION MIDDLEWARE ================
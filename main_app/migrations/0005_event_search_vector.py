@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# The GIN indexes only exist on PostgreSQL, other databases use the icontains search backend
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE INDEX event_search_vector_gin ON event USING gin (search_vector)')
+    schema_editor.execute('CREATE INDEX event_title_trgm_gin ON event USING gin (title gin_trgm_ops)')
+    # Backfill the vector for the existing events
+    schema_editor.execute(
+        """
+        UPDATE event SET search_vector =
+            setweight(to_tsvector(%(config)s, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector(%(config)s, coalesce(location, '')), 'B') ||
+            setweight(to_tsvector(%(config)s, coalesce(description, '')), 'C') ||
+            setweight(to_tsvector(%(config)s, coalesce(
+                (SELECT username FROM "user" WHERE "user".id = event.created_by_id), ''
+            )), 'D')
+        """,
+        params={'config': settings.EVENT_SEARCH_CONFIG},
+    )
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS event_search_vector_gin')
+    schema_editor.execute('DROP INDEX IF EXISTS event_title_trgm_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0004_alter_event_description'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
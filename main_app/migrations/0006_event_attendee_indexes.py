@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0005_event_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendee',
+            index=models.Index(fields=['event', 'confirmed'], name='attendee_event_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendee',
+            index=models.Index(fields=['user', 'confirmed'], name='attendee_user_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-date', 'id'], name='event_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_by', '-date'], name='event_creator_date_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:56
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Event = apps.get_model('main_app', 'Event')
+    Attendee = apps.get_model('main_app', 'Attendee')
+    def count(queryset):
+        totals = queryset.order_by().values('event').annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+    attendees = Attendee.objects.filter(event=OuterRef('pk'))
+    Event.objects.using(schema_editor.connection.alias).update(
+        attendee_count=count(attendees),
+        confirmed_count=count(attendees.filter(confirmed=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0006_event_attendee_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendee_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='confirmed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
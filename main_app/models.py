@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models import OuterRef, Subquery
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.conf import settings
 
 # Create your models here.
@@ -12,28 +14,131 @@ class CustomUser(AbstractUser):
     class Meta:
         db_table = 'user'
 
+class EventQuerySet(models.QuerySet):
+    # Load the creator and annotate the current user's status so serializing a list of
+    # events takes a single query (the counts are stored on the event itself).
+    # creator/status=False skip the join/annotation when the response does not use them.
+    def with_attendance(self, user=None, creator=True, status=True):
+        queryset = self.defer('search_vector') # Only used inside queries
+        if creator:
+            queryset = queryset.select_related('created_by')
+        if status and user is not None and user.is_authenticated:
+            # None when the user is not registered, otherwise the confirmed flag
+            user_attendance = Attendee.objects.filter(event=OuterRef('pk'), user=user).values('confirmed')[:1]
+            queryset = queryset.annotate(user_confirmed=Subquery(user_attendance))
+        return queryset
+
+    # Recompute the full-text search vector (PostgreSQL only, the column is unused elsewhere)
+    def update_search_vector(self):
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        config = settings.EVENT_SEARCH_CONFIG
+        username = CustomUser.objects.filter(pk=OuterRef('created_by')).values('username')[:1]
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=config) +
+            SearchVector('location', weight='B', config=config) +
+            SearchVector('description', weight='C', config=config) +
+            SearchVector(Subquery(username), weight='D', config=config)
+        ))
+
 class Event(models.Model):
     title = models.CharField(max_length=200, blank=False)
     description = models.TextField(blank=True, null=True)
     date = models.DateTimeField(blank=False)
     location = models.CharField(max_length=255, blank=False)
     created_by = models.ForeignKey(User, blank=False, on_delete=models.CASCADE, related_name='created_events')
+    search_vector = SearchVectorField(null=True, editable=False) # Maintained on save, GIN indexed on PostgreSQL
+    # Denormalized counters, updated with F() expressions by main_app.attendance
+    attendee_count = models.IntegerField(default=0, editable=False)
+    confirmed_count = models.IntegerField(default=0, editable=False)
+    # Change feed (main_app.changes), updated_at is also set by the queryset updates
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
     
     def __str__(self):
         return f"Event: {self.title} - Created by {self.created_by.username}. This Event will be on {self.date.strftime('%Y-%m-%d')} at {self.date.strftime('%H:%M')}"
+
+    # Columns of the search vector (the creator's username through created_by)
+    SEARCH_FIELDS = ('title', 'location', 'description', 'created_by')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._search_values = instance.get_search_values()
+        return instance
+
+    # Loaded values of the search fields (deferred fields are left out)
+    def get_search_values(self):
+        attnames = (self._meta.get_field(name).attname for name in self.SEARCH_FIELDS)
+        return {attname: self.__dict__[attname] for attname in attnames if attname in self.__dict__}
+
+    # The vector is only recomputed (a second UPDATE) when a field it is built from is saved
+    # with a new value, or listed in update_fields
+    def save(self, *args, **kwargs):
+        values = self.get_search_values()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            saved = {self._meta.get_field(name).attname for name in update_fields}
+            stale = not saved.isdisjoint(self._meta.get_field(name).attname for name in self.SEARCH_FIELDS)
+            # The other fields keep the values the database has
+            values = {**getattr(self, '_search_values', {}), **{attname: value for attname, value in values.items() if attname in saved}}
+        else:
+            stale = self._state.adding or values != getattr(self, '_search_values', None)
+        super().save(*args, **kwargs)
+        if stale:
+            Event.objects.filter(pk=self.pk).update_search_vector()
+        self._search_values = values
+
+    @property
+    def pending_count(self):
+        return self.attendee_count - self.confirmed_count
     
     class Meta:
         db_table = 'event'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', 'id'], name='event_date_id_idx'), # Default ordering, date filter and cursor pagination
+            models.Index(fields=['created_by', '-date'], name='event_creator_date_idx'), # My events
+            models.Index(fields=['updated_at', 'id'], name='event_updated_id_idx'), # Change feed
+        ]
 
 class Attendee(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendances')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendees')
     confirmed = models.BooleanField(default=False)    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"user: {self.user.username} attending event: {self.event.title}"
     
     class Meta:
         db_table = 'attendee'
-        unique_together = ('user', 'event')  # Ensure a user can only register for an event once
\ No newline at end of file
+        unique_together = ('user', 'event')  # Ensure a user can only register for an event once
+        indexes = [
+            models.Index(fields=['event', 'confirmed'], name='attendee_event_confirmed_idx'), # Attendee counts per event
+            models.Index(fields=['user', 'confirmed'], name='attendee_user_confirmed_idx'), # User stats
+            models.Index(fields=['user', 'updated_at', 'id'], name='attendee_user_updated_idx'), # Change feed
+        ]
+
+# Deleted events and cancelled attendances for the change feed (main_app.changes). Event
+# tombstones are seen by every user, attendance tombstones only by the attendee.
+class Tombstone(models.Model):
+    EVENT = 'event'
+    ATTENDANCE = 'attendance'
+    KIND_CHOICES = [(EVENT, 'Event'), (ATTENDANCE, 'Attendance')]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    event_id = models.BigIntegerField()
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tombstone'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx'),
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+        ]
\ No newline at end of file
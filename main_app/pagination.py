@@ -0,0 +1,126 @@
+import base64
+import json
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# ================ EVENT CURSOR PAGINATION ================
+# Keyset pagination on the stable (-date, id) ordering. The cursor holds the position of
+# the first/last event of the current page, so every page is a WHERE on the ordering
+# columns plus a LIMIT and deep pages cost the same as the first one (no OFFSET).
+# Pagination is opt-in: it only applies when `cursor` or `page_size` is in the query string.
+# Not built on DRF's CursorPagination: its cursor holds the value of the first ordering column
+# only and skips the rows tied with it by OFFSET, which pages wrongly when an event is added or
+# moved within a tie (events share dates), and the async views need the page as a lazy
+# queryset (get_page_queryset) to fetch it with the async ORM.
+class EventCursorPagination:
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-date', 'id')
+    reverse_ordering = ('date', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.default_page_size = getattr(settings, 'EVENT_PAGE_SIZE', 20)
+        self.max_page_size = getattr(settings, 'EVENT_MAX_PAGE_SIZE', 100)
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        if page_size <= 0:
+            return self.default_page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, event, reverse=False):
+        position = {'d': event.date.isoformat(), 'i': event.pk, 'r': int(reverse)}
+        data = json.dumps(position, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, encoded):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            return datetime.fromisoformat(position['d']), int(position['i']), bool(position['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # Build the (still lazy) queryset for the requested page, fetching one extra row
+    # to know whether there is another page in the direction we are moving
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        encoded = request.query_params.get(self.cursor_query_param)
+        self.has_cursor = bool(encoded)
+        self.reverse = False
+        if encoded:
+            date, pk, self.reverse = self.decode_cursor(encoded)
+            if self.reverse:
+                queryset = queryset.filter(Q(date__gt=date) | Q(date=date, id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__gt=pk))
+        queryset = queryset.order_by(*(self.reverse_ordering if self.reverse else self.ordering))
+        return queryset[:self.page_size + 1]
+
+    # Trim the extra row and work out the next/previous cursors from the fetched rows
+    def paginate_rows(self, rows):
+        rows = list(rows)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.has_cursor
+        self.next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self.paginate_rows(self.get_page_queryset(queryset, request))
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self.get_link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self.get_link(self.previous_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+# ================ END OF EVENT CURSOR PAGINATION ================
+
+# ================ ATTENDEE CURSOR PAGINATION ================
+# Keyset pagination of an event's attendees on their unique id, so DRF's cursor pagination
+# never needs an offset
+class AttendeeCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'ATTENDEE_PAGE_SIZE', 100)
+        self.max_page_size = getattr(settings, 'ATTENDEE_MAX_PAGE_SIZE', 1000)
+# ================ END OF ATTENDEE CURSOR PAGINATION ================
@@ -0,0 +1,44 @@
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError: # Optional, the classes below fall back to DRF's stdlib implementation
+    orjson = None
+
+# ================ FAST JSON RENDERER / PARSER ================
+# orjson encodes UUIDs natively and the result is the same compact UTF-8 output as DRF's
+# JSONRenderer. Everything orjson does not know (Decimal, lazy translation strings, ...) goes
+# through DRF's encoder, and so do dates, times and datetimes: orjson would format them its
+# own way (fractional seconds, aware times), DRF's encoder keeps the output byte for byte.
+_encoder = encoders.JSONEncoder()
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+        # Same escaping as JSONRenderer, the output stays a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+# ================ END OF FAST JSON RENDERER / PARSER ================
@@ -0,0 +1,183 @@
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+# ================ READ REPLICA ROUTING ================
+# Installed when settings.DATABASE_REPLICAS lists replica aliases (DATABASE_REPLICA_URLS). Writes
+# always go to `default`. Reads go to a replica only inside a request that ReplicaMiddleware
+# marked as replica-safe: a GET/HEAD/OPTIONS request from a client that did not write recently.
+# Everything else (writes, atomic blocks, management commands, background work, the reads of a
+# write request) reads from the primary.
+#
+# Read-your-writes: after a successful write request the user is pinned to the primary for
+# REPLICA_STICKY_SECONDS (a key in the shared cache), and a freshly issued access token (sign
+# in, sign up, refresh) counts as a write, so the first reads of a new session see the rows the
+# session was created with. The window must be longer than the replication lag; replicas
+# lagging more than REPLICA_MAX_LAG_SECONDS are taken out of rotation by the health check.
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Inside a transaction on the primary, reads must see its (uncommitted) writes
+        if _use_replica.get() and not connections['default'].in_atomic_block:
+            replicas = healthy_replicas()
+            if replicas:
+                return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # Same data on every alias
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default' # Replicas get the schema through replication
+
+# Reads of the block go to the primary: data written to a shared cache must not come from a
+# lagging replica, it would be served as current after the write that changed it
+@contextmanager
+def use_primary():
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+# The rest of the current request reads from the primary (ReplicaMiddleware restores the state)
+def read_from_primary():
+    _use_replica.set(False)
+
+def _pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), 1, timeout=settings.REPLICA_STICKY_SECONDS)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        user_id, fresh = self.get_token_user(request)
+        use_replica = self.safe(request, fresh) and (user_id is None or cache.get(_pin_key(user_id)) is None)
+        token = _use_replica.set(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        if self.should_pin(request, response, user_id):
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        user_id, fresh = self.get_token_user(request)
+        use_replica = self.safe(request, fresh) and (user_id is None or await cache.aget(_pin_key(user_id)) is None)
+        token = _use_replica.set(use_replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        if self.should_pin(request, response, user_id):
+            await cache.aset(_pin_key(user_id), 1, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    # (user id, token issued within the sticky window) of the request's access token, read
+    # without any database access; (None, False) for anonymous requests and invalid tokens
+    def get_token_user(self, request):
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+        from rest_framework_simplejwt.settings import api_settings
+        from main_app.authentication import QueryTokenJWTAuthentication
+        auth = QueryTokenJWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None, False
+        try:
+            validated_token = auth.get_validated_token(raw_token)
+        except (InvalidToken, AuthenticationFailed):
+            return None, False
+        issued_at = validated_token.get('iat', 0)
+        return validated_token.get(api_settings.USER_ID_CLAIM), time.time() - issued_at < settings.REPLICA_STICKY_SECONDS
+
+    def safe(self, request, fresh):
+        return request.method in SAFE_METHODS and not fresh
+
+    def should_pin(self, request, response, user_id):
+        return request.method not in SAFE_METHODS and user_id is not None and response.status_code < 400
+# ================ END OF READ REPLICA ROUTING ================
+
+# ================ REPLICA HEALTH ================
+# Replication lag of every replica, checked at most every REPLICA_CHECK_INTERVAL seconds per
+# process by the router (one query per replica). A replica that cannot be reached or lags more
+# than REPLICA_MAX_LAG_SECONDS gets no reads until a later check finds it caught up.
+_health = {'checked_at': None, 'healthy': [], 'statuses': []}
+_health_lock = threading.Lock()
+
+# PostgreSQL streaming replica: 0 when everything received has been replayed, otherwise the
+# age of the last replayed transaction. NULL on a primary.
+_PG_LAG_SQL = '''
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+'''
+
+# Seconds behind the primary, None when the database cannot tell (not a PostgreSQL replica).
+# Raises DatabaseError when the replica cannot be reached.
+def replica_lag(alias):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return None
+        cursor.execute(_PG_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return None if lag is None else float(lag)
+
+def check_replicas():
+    statuses = []
+    for alias in settings.DATABASE_REPLICAS:
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError as error:
+            statuses.append({'alias': alias, 'healthy': False, 'lag': None, 'error': type(error).__name__})
+            continue
+        statuses.append({'alias': alias, 'healthy': lag is None or lag <= settings.REPLICA_MAX_LAG_SECONDS, 'lag': lag})
+    _health['healthy'] = [status['alias'] for status in statuses if status['healthy']]
+    _health['statuses'] = statuses
+    _health['checked_at'] = time.monotonic()
+    return statuses
+
+def healthy_replicas():
+    checked_at = _health['checked_at']
+    if checked_at is None or time.monotonic() - checked_at >= settings.REPLICA_CHECK_INTERVAL:
+        # One thread checks, the others keep using the last result meanwhile
+        if _health_lock.acquire(blocking=checked_at is None):
+            try:
+                with use_primary():
+                    check_replicas()
+            finally:
+                _health_lock.release()
+    return _health['healthy']
+
+# Statuses of the last check, refreshed like healthy_replicas(): however often it is called, the
+# replicas are queried at most every REPLICA_CHECK_INTERVAL seconds
+def replica_statuses():
+    healthy_replicas()
+    return _health['statuses']
+# ================ END OF REPLICA HEALTH ================
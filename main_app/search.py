@@ -0,0 +1,67 @@
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+# ================ EVENT SEARCH BACKENDS ================
+# The `search` parameter of EventListView goes through a pluggable backend. The backend is
+# picked with settings.EVENT_SEARCH_BACKEND (dotted path), or from the database vendor.
+class BaseSearchBackend:
+    def search(self, queryset, term):
+        raise NotImplementedError('Search backends must implement search()')
+
+    # Ordering used when the results are not cursor paginated
+    def order_by_relevance(self, queryset):
+        return queryset.order_by('-date')
+
+# Portable backend: the original icontains chain. Used on SQLite (tests and local runs).
+class SimpleSearchBackend(BaseSearchBackend):
+    def search(self, queryset, term):
+        return queryset.filter(
+            Q(title__icontains=term) |
+            Q(created_by__username__icontains=term) |
+            Q(description__icontains=term) |
+            Q(location__icontains=term)
+        )
+
+# PostgreSQL backend: matches the maintained Event.search_vector column (GIN indexed) with
+# prefix matching on every word, ranks the results, and also accepts typo-tolerant matches
+# on the title through the pg_trgm GIN index.
+class PostgresSearchBackend(BaseSearchBackend):
+    def build_query(self, term):
+        words = re.findall(r'\w+', term)
+        if not words:
+            return None
+        # Every word must match, the last word(s) can be incomplete (search as you type)
+        raw_query = ' & '.join(f'{word}:*' for word in words)
+        return SearchQuery(raw_query, search_type='raw', config=settings.EVENT_SEARCH_CONFIG)
+
+    def search(self, queryset, term):
+        query = self.build_query(term)
+        if query is None:
+            # Only punctuation was given, nothing can match the vector
+            return SimpleSearchBackend().search(queryset, term)
+        return queryset.filter(
+            Q(search_vector=query) | Q(title__trigram_similar=term)
+        ).annotate(search_rank=SearchRank(F('search_vector'), query))
+
+    def order_by_relevance(self, queryset):
+        if 'search_rank' not in queryset.query.annotations:
+            return super().order_by_relevance(queryset)
+        return queryset.order_by('-search_rank', '-date')
+
+_backends = {}
+
+def get_search_backend(using='default'):
+    path = getattr(settings, 'EVENT_SEARCH_BACKEND', None)
+    if not path:
+        if connections[using].vendor == 'postgresql':
+            path = 'main_app.search.PostgresSearchBackend'
+        else:
+            path = 'main_app.search.SimpleSearchBackend'
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+# ================ END OF EVENT SEARCH BACKENDS ================
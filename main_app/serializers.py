@@ -1,18 +1,104 @@
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from operator import attrgetter
+from django.db import models
 from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
 from .models import (Event, Attendee)
+from .attendance import BULK_ACTIONS
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 # Set User to CustomUser
 User = get_user_model()
 
+# ================ FIELD SELECTION ================
+# ?fields=id,title,date picks the fields of the response, ?expand=created_by picks the nested
+# objects that are serialized in full, the others are replaced by their id. Nested fields are
+# reached with dots (?fields=id,event.title&expand=event). Without ?expand every nested object
+# is expanded, without ?fields every field is returned.
+def _parse_paths(value):
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+class FieldSelection:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields or None # None: every field
+        self.expand = expand # None: every nested serializer
+
+    @classmethod
+    def from_request(cls, request):
+        params = getattr(request, 'query_params', {})
+        fields, expand = params.get('fields'), params.get('expand')
+        return cls(
+            _parse_paths(fields) if fields else None,
+            _parse_paths(expand) if expand is not None else None,
+        )
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+    def nested(self, name):
+        return FieldSelection(
+            self.fields.get(name) if self.fields is not None else None,
+            self.expand.get(name, {}) if self.expand is not None else None,
+        )
+
+    def without(self, name):
+        fields = {key: value for key, value in self.fields.items() if key != name} if self.fields else None
+        return FieldSelection(fields, self.expand)
+
+# Drops the fields that are not selected when the serializer is built, so they are never
+# computed. The selection comes from the `selection` argument or the request in the context.
+# A serializer given input data (create, update) keeps every field to validate and save it,
+# the selection only applies to the response it renders.
+class FieldSelectionMixin:
+    def __init__(self, *args, selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if selection is None:
+            request = self.context.get('request')
+            selection = FieldSelection.from_request(request) if request is not None else FieldSelection()
+        self.selection, self.pending_selection = selection, None
+        if hasattr(self, 'initial_data'):
+            self.pending_selection = selection
+        else:
+            self.apply_selection(selection)
+
+    def to_representation(self, instance):
+        if self.pending_selection is not None:
+            self.apply_selection(self.pending_selection)
+            self.pending_selection = None
+        return super().to_representation(instance)
+
+    def apply_selection(self, selection):
+        self.selection = selection
+        if selection.fields is None and selection.expand is None:
+            return
+        for name, field in list(self.fields.items()):
+            if field.write_only:
+                continue # Inputs are not part of the response
+            if not selection.includes(name):
+                del self.fields[name]
+            elif isinstance(field, FieldSelectionMixin):
+                if selection.expands(name):
+                    field.apply_selection(selection.nested(name))
+                else:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+# ================ END OF FIELD SELECTION ================
+
 # ================ USER AND AUTH SERIALIZERS ================
 
 # User serializer for displaying user information
-class UserSerializer(serializers.ModelSerializer): 
+class UserSerializer(FieldSelectionMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -72,18 +158,8 @@ class UserSigninSerializer(serializers.Serializer):
         password = attrs.get('password')
         if not username_or_email or not password:
             raise serializers.ValidationError("Both username/email and password are required.", code='authorization')
-        # First, try to authenticate with the given credential as a username.
-        # This handles standard username login and cases where the username is an email.
-        user = authenticate(username=username_or_email, password=password)
-        # If authentication fails, and the input looks like an email, try to find
-        # the user by email and authenticate with their actual username.
-        if user is None and '@' in username_or_email:
-            try:
-                user_obj = User.objects.get(email__iexact=username_or_email)
-                user = authenticate(username=user_obj.username, password=password)
-            except User.DoesNotExist:
-                # This pass is fine because we'll fail the final check regardless.
-                pass
+        # UsernameOrEmailBackend resolves the username or the email in one query and one hash
+        user = authenticate(request=self.context.get('request'), username=username_or_email, password=password)
         if not user:
             raise serializers.ValidationError("Invalid email or password.", code='authorization')
         attrs['user'] = user
@@ -138,7 +214,70 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 # ================ END OF USER AND AUTH SERIALIZERS ================
 
 # ================ EVENT SERIALIZERS ================
-class EventSerializer(serializers.ModelSerializer):
+# Combine the date and time inputs into the value stored in Event.date
+def combine_date_time(date, time):
+    datetime_obj = timezone.datetime.combine(date, time)
+    # Timezone aware if USE_TZ set to true in settings
+    if settings.USE_TZ:
+        datetime_obj = timezone.make_aware(datetime_obj, timezone.get_default_timezone())
+    return datetime_obj
+
+# Read path of EventSerializer(many=True). The generic ListSerializer runs every row through
+# get_attribute()/to_representation() of every field. This one compiles a getter per selected
+# field once for the whole list: plain model columns are read directly, method fields call
+# their method, and the nested creator is serialized once per user. Same output as the
+# generic path.
+class EventListSerializer(serializers.ListSerializer):
+    PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.BooleanField)
+
+    def compile_getters(self):
+        getters = []
+        for field in self.child._readable_fields:
+            if type(field) in self.PLAIN_FIELDS and len(field.source_attrs) == 1:
+                getters.append((field.field_name, attrgetter(field.source_attrs[0])))
+            elif isinstance(field, serializers.SerializerMethodField):
+                getters.append((field.field_name, getattr(self.child, field.method_name)))
+            elif isinstance(field, serializers.BaseSerializer):
+                getters.append((field.field_name, self._nested_getter(field)))
+            else:
+                getters.append((field.field_name, self._field_getter(field)))
+        return getters
+
+    @staticmethod
+    def _field_getter(field):
+        def get(instance):
+            attribute = field.get_attribute(instance)
+            value = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            return None if value is None else field.to_representation(attribute)
+        return get
+
+    @staticmethod
+    def _nested_getter(field):
+        cache = {}
+        def get(instance):
+            related = field.get_attribute(instance)
+            if related is None:
+                return None
+            if related.pk not in cache:
+                cache[related.pk] = field.to_representation(related)
+            return cache[related.pk]
+        return get
+
+    def to_representation(self, data):
+        events = data.all() if isinstance(data, models.manager.BaseManager) else data
+        getters = self.compile_getters()
+        include_date, include_time = self.child.selection.includes('date'), self.child.selection.includes('time')
+        rows = []
+        for event in events:
+            row = {name: get(event) for name, get in getters}
+            if include_date:
+                row['date'] = event.date.date()
+            if include_time:
+                row['time'] = event.date.time()
+            rows.append(row)
+        return rows
+
+class EventSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True) # User object
     created_by_username = serializers.CharField(source='created_by.username', read_only=True) # Username string
     attendee_count = serializers.SerializerMethodField() # Count registered users
@@ -154,6 +293,7 @@ class EventSerializer(serializers.ModelSerializer):
                   'created_by', 'created_by_username', 'attendee_count', 
                   'confirmed_count', 'pending_count', 'user_attendance_status']
         read_only_fields = ['id', 'created_by']
+        list_serializer_class = EventListSerializer
 
     def validate(self, attrs):
         if self.instance is None:
@@ -165,11 +305,7 @@ class EventSerializer(serializers.ModelSerializer):
         # Handle date and time combination
         date = validated_data.pop('date')
         time = validated_data.pop('time')
-        datetime_obj = timezone.datetime.combine(date, time)
-        # Timezone aware if USE_TZ set to true in settings
-        if settings.USE_TZ:
-            datetime_obj = timezone.make_aware(datetime_obj, timezone.get_default_timezone())
-        validated_data['date'] = datetime_obj # Set date-time combination to date field in Event model
+        validated_data['date'] = combine_date_time(date, time) # Set date-time combination to date field in Event model
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             validated_data['created_by'] = request.user # Set created_by to the current authenticated user
@@ -195,27 +331,60 @@ class EventSerializer(serializers.ModelSerializer):
         instance.date = datetime_obj
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        # Only the edited columns: the counters read with the instance may be stale by now
+        # (main_app.attendance updates them with F() expressions)
+        instance.save(update_fields=['date', *validated_data, 'updated_at'])
+        instance.refresh_from_db(fields=['attendee_count', 'confirmed_count'])
         return instance
 
     def to_representation(self, instance):
+        # An event shared by many rows (the attendee list) is serialized once
+        cache = self.context.get('event_cache')
+        if cache is not None and instance.pk in cache:
+            return cache[instance.pk]
         representation = super().to_representation(instance)
-        representation['date'] = instance.date.date()
-        representation['time'] = instance.date.time()
+        if self.selection.includes('date'):
+            representation['date'] = instance.date.date()
+        if self.selection.includes('time'):
+            representation['time'] = instance.date.time()
+        if cache is not None:
+            cache[instance.pk] = representation
         return representation
 
+    # Load only what the selected fields use: the creator join, the user status annotation
+    # and the description column are skipped when nothing selected needs them
+    @classmethod
+    def setup_eager_loading(cls, queryset, request, selection=None):
+        selection = selection or FieldSelection.from_request(request)
+        queryset = queryset.with_attendance(
+            request.user,
+            creator=selection.includes('created_by_username') or (
+                selection.includes('created_by') and selection.expands('created_by')
+            ),
+            status=selection.includes('user_attendance_status'),
+        )
+        if not selection.includes('description'):
+            queryset = queryset.defer('description')
+        return queryset
+
+    # The counts are stored on the event, the user status is read from the annotation
+    # added by Event.objects.with_attendance() when present, otherwise it is queried
     def get_attendee_count(self, obj):
-        return obj.attendees.count()
+        return obj.attendee_count
     
     def get_confirmed_count(self, obj):
-        return obj.attendees.filter(confirmed=True).count()
+        return obj.confirmed_count
     
     def get_pending_count(self, obj):
-        return obj.attendees.filter(confirmed=False).count()
+        return obj.pending_count
     
     def get_user_attendance_status(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_confirmed'):
+                if obj.user_confirmed is None:
+                    return 'not_registered'
+                return 'confirmed' if obj.user_confirmed else 'pending'
             user = request.user
             try:
                 attendee = obj.attendees.get(user=user)
@@ -226,7 +395,7 @@ class EventSerializer(serializers.ModelSerializer):
 # ================ END OF EVENT SERIALIZER ================ 
 
 # ================ ATTENDEE SERIALIZER ================    
-class AttendeeSerializer(serializers.ModelSerializer):
+class AttendeeSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     event = EventSerializer(read_only=True)
 
@@ -255,4 +424,33 @@ class AttendeeSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             validated_data['user'] = request.user
         return super().update(instance, validated_data)
-# ================ END OF ATTENDEE SERIALIZER ================
\ No newline at end of file
+
+# Attendee row of the compact attendee list, the event is returned once next to the list
+class AttendeeCompactSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
+
+    class Meta:
+        model = Attendee
+        fields = ['id', 'user_id', 'username', 'first_name', 'last_name', 'confirmed']
+        read_only_fields = fields
+# ================ END OF ATTENDEE SERIALIZER ================
+
+# ================ BULK ATTENDANCE SERIALIZERS ================
+class BulkAttendanceSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=BULK_ACTIONS)
+
+# Organizer: many users of one event
+class BulkEventAttendeesSerializer(BulkAttendanceSerializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=settings.BULK_ATTENDANCE_MAX_ITEMS
+    )
+
+# Current user: many events
+class BulkUserAttendanceSerializer(BulkAttendanceSerializer):
+    event_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=settings.BULK_ATTENDANCE_MAX_ITEMS
+    )
+# ================ END OF BULK ATTENDANCE SERIALIZERS ================
@@ -0,0 +1,154 @@
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from main_app.metrics import record_cache
+from main_app.models import Event, Attendee
+from main_app.routers import use_primary
+from main_app.utils import shared_cache
+
+User = get_user_model()
+
+# ================ USER STATS ================
+STAT_FIELDS = ('created_events', 'attending_events', 'confirmed_events', 'pending_events', 'upcoming_events')
+NEXT_EVENT = 'next_event' # Date of the next attended event, the cached counts are valid until then
+
+def _count(queryset, group_by):
+    totals = queryset.order_by().values(group_by).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+# Every stat of a user in a single query (one scalar subquery per stat on the user row)
+def _stats_query(user):
+    now = timezone.now()
+    attendances = Attendee.objects.filter(user=OuterRef('pk'))
+    upcoming = attendances.filter(event__date__gte=now)
+    next_event = upcoming.order_by().values('user').annotate(first=Min('event__date')).values('first')
+    # The annotations are prefixed, `created_events` is already the name of a relation
+    return User.objects.filter(pk=user.pk).values(
+        total_created_events=_count(Event.objects.filter(created_by=OuterRef('pk')), 'created_by'),
+        total_attending_events=_count(attendances, 'user'),
+        total_confirmed_events=_count(attendances.filter(confirmed=True), 'user'),
+        total_pending_events=_count(upcoming.filter(confirmed=False), 'user'),
+        total_upcoming_events=_count(upcoming, 'user'),
+        next_event=Subquery(next_event),
+    )
+
+def _stats_from_row(row):
+    row = row or {}
+    stats = {field: row.get(f'total_{field}', 0) for field in STAT_FIELDS}
+    return stats, row.get('next_event')
+
+def compute_user_stats(user):
+    return _stats_from_row(_stats_query(user).first())
+
+async def acompute_user_stats(user):
+    return _stats_from_row(await _stats_query(user).afirst())
+
+# Optional per-user cache (settings.USER_STATS_CACHE, with a shared CACHE_BACKEND: with a cache
+# local to each worker, every worker would keep its own counts and apply only its own writes).
+# Every stat is its own cache key so the write paths can update it with atomic cache.incr()
+# calls instead of recomputing it. The keys include a per-user version read before the stats
+# are computed: a write that cannot update the cached stats replaces the version, so stats
+# computed before that write and stored after it are never read.
+def cache_enabled():
+    return settings.USER_STATS_CACHE and shared_cache()
+
+def _version_key(user_id):
+    return f'user-stats:{user_id}:version'
+
+def _keys(user_id, version):
+    return {field: f'user-stats:{user_id}:{version}:{field}' for field in STAT_FIELDS + (NEXT_EVENT,)}
+
+def _current_keys(user_id):
+    version = cache.get(_version_key(user_id))
+    return _keys(user_id, version) if version is not None else None
+
+def get_user_stats(user):
+    if not cache_enabled():
+        return compute_user_stats(user)[0]
+    version = cache.get(_version_key(user.pk))
+    if version is None:
+        cache.add(_version_key(user.pk), uuid.uuid4().hex, timeout=settings.USER_STATS_CACHE_TIMEOUT)
+        version = cache.get(_version_key(user.pk))
+    keys = _keys(user.pk, version)
+    cached = cache.get_many(keys.values())
+    if len(cached) == len(keys):
+        # Pending and upcoming counts change once the next attended event starts
+        next_event = cached[keys[NEXT_EVENT]]
+        if not next_event or timezone.now() < next_event:
+            record_cache('user_stats', True)
+            return {field: cached[keys[field]] for field in STAT_FIELDS}
+    record_cache('user_stats', False)
+    with use_primary(): # Cached and then updated incrementally, must not start from stale rows
+        stats, next_event = compute_user_stats(user)
+    values = {keys[field]: stats[field] for field in STAT_FIELDS}
+    values[keys[NEXT_EVENT]] = next_event or 0 # 0: no upcoming event
+    cache.set_many(values, timeout=settings.USER_STATS_CACHE_TIMEOUT)
+    return stats
+
+# For the async views: the cached path does several cache round trips and runs in a thread,
+# like the default implementation of Django's async cache API
+async def aget_user_stats(user):
+    if not cache_enabled():
+        return (await acompute_user_stats(user))[0]
+    return await sync_to_async(get_user_stats)(user)
+
+def invalidate_user_stats(*user_ids):
+    if cache_enabled() and user_ids:
+        cache.set_many(
+            {_version_key(user_id): uuid.uuid4().hex for user_id in user_ids},
+            timeout=settings.USER_STATS_CACHE_TIMEOUT,
+        )
+
+def _apply(user_id, **deltas):
+    if not cache_enabled():
+        return
+    keys = _current_keys(user_id)
+    if keys is None:
+        return # Nothing cached
+    try:
+        for field, delta in deltas.items():
+            if delta:
+                cache.incr(keys[field], delta)
+    except ValueError:
+        # The entry was evicted or is still being computed (possibly without this write),
+        # it will be recomputed on the next read
+        invalidate_user_stats(user_id)
+
+def _is_upcoming(event):
+    return event.date >= timezone.now()
+
+def record_event_created(user_id):
+    _apply(user_id, created_events=1)
+
+def record_attendance_added(user_id, event):
+    upcoming = _is_upcoming(event)
+    keys = _current_keys(user_id) if upcoming and cache_enabled() else None
+    if keys is not None:
+        next_event = cache.get(keys[NEXT_EVENT])
+        if next_event is not None and (not next_event or event.date < next_event):
+            # The cached counts would be valid past this event's start, recompute them
+            invalidate_user_stats(user_id)
+            return
+    _apply(user_id, attending_events=1, upcoming_events=int(upcoming), pending_events=int(upcoming))
+
+def record_attendance_confirmed(user_id, event):
+    _apply(user_id, confirmed_events=1, pending_events=-int(_is_upcoming(event)))
+
+def record_attendance_declined(user_id, event):
+    _apply(user_id, confirmed_events=-1, pending_events=int(_is_upcoming(event)))
+
+def record_attendance_removed(user_id, event, confirmed):
+    upcoming = _is_upcoming(event)
+    _apply(
+        user_id,
+        attending_events=-1,
+        confirmed_events=-int(confirmed),
+        upcoming_events=-int(upcoming),
+        pending_events=-int(upcoming and not confirmed),
+    )
+# ================ END OF USER STATS ================
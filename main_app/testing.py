@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+from main_app.middleware import QueryRecorder
+
+# ================ QUERY BUDGET ASSERTIONS ================
+# Fail a test when the code in the block runs more than `max_queries` queries, e.g.
+#   with assert_max_queries(4):
+#       self.client.get('/api/events/')
+# The failure lists the queries run, the repeated ones first, which is usually the N+1.
+@contextmanager
+def assert_max_queries(max_queries, using=None):
+    recorder = QueryRecorder()
+    with recorder.record(using):
+        yield recorder
+    if recorder.count > max_queries:
+        lines = [f'{count}x {sql}' for sql, count in recorder.duplicates()]
+        lines += [sql for sql, _ in recorder.queries]
+        raise AssertionError(
+            f'{recorder.count} queries run, the budget is {max_queries}:\n' + '\n'.join(lines)
+        )
+
+# TestCase mixin: self.assertMaxQueries(4, self.client.get, '/api/events/') or as a context manager
+class QueryBudgetMixin:
+    def assertMaxQueries(self, max_queries, func=None, *args, using=None, **kwargs):
+        context = assert_max_queries(max_queries, using)
+        if func is None:
+            return context
+        with context:
+            return func(*args, **kwargs)
+# ================ END OF QUERY BUDGET ASSERTIONS ================
@@ -0,0 +1,86 @@
+import hashlib
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+# ================ TOKEN BUCKET THROTTLING ================
+# Token buckets in the shared Django cache for the password hashing endpoints (sign in, sign
+# up, tokens, password update) and the event import, checked by DRF before the view runs so
+# rejected requests never reach the hasher or the database. A view sets `throttle_scope` and the rates are read from
+# settings.AUTH_THROTTLE_RATES as '<scope>.<kind>': 'requests/period', e.g. 'signin.ip': '20/min'
+# is a bucket of 20 requests refilled over a minute. Missing rate: no throttling.
+#
+# The bucket is stored as its "theoretical arrival time" (GCRA) in milliseconds, advanced with
+# atomic cache.incr() calls: a request takes a token by adding one refill interval, and is
+# allowed while the result is at most a full bucket (rate * interval) ahead of now.
+def parse_rate(rate):
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None # Second part of the rate name
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if not settings.AUTH_THROTTLE:
+            return True
+        scope = getattr(view, 'throttle_scope', None)
+        rate = settings.AUTH_THROTTLE_RATES.get(f'{scope}.{self.kind}')
+        if not rate:
+            return True
+        ident = self.get_bucket_ident(request, view)
+        if not ident:
+            return True
+        num_requests, period = parse_rate(rate)
+        interval = max(1, period * 1000 // num_requests)
+        burst = interval * num_requests
+        now = int(time.time() * 1000)
+        key = f'throttle:{scope}:{self.kind}:{ident}'
+        timeout = period + 1 # Long enough for the bucket to refill completely
+        try:
+            tat = cache.incr(key, interval)
+        except ValueError:
+            if cache.add(key, now + interval, timeout):
+                return True
+            tat = cache.incr(key, interval)
+        if tat <= now + interval:
+            # The bucket was full, restart it from now
+            cache.set(key, now + interval, timeout)
+            return True
+        if tat - now <= burst:
+            cache.touch(key, timeout)
+            return True
+        cache.decr(key, interval) # Rejected requests take no token
+        self.retry_after = (tat - burst - now) / 1000
+        return False
+
+    def wait(self):
+        return math.ceil(self.retry_after)
+
+# Client IP (REMOTE_ADDR, or X-Forwarded-For behind settings.REST_FRAMEWORK['NUM_PROXIES'])
+class IPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+# The account the request is about: the authenticated user, otherwise the identifier posted
+# in the first of the view's `throttle_account_fields` that is present
+class AccountThrottle(TokenBucketThrottle):
+    kind = 'account'
+
+    def get_bucket_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        data = request.data
+        for field in getattr(view, 'throttle_account_fields', ()):
+            value = data.get(field) if hasattr(data, 'get') else None
+            if isinstance(value, str) and value.strip():
+                # Hashed: any user input becomes a short key safe for every cache backend
+                return hashlib.sha1(value.strip().lower().encode()).hexdigest()
+        return None
+# ================ END OF TOKEN BUCKET THROTTLING ================
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from main_app.utils import LocalTTLCache
+
+# ================ REFRESH TOKENS ================
+# Process-local set of recently blacklisted JTIs. A blacklisted token stays blacklisted, so
+# repeated checks of the same token (replayed refreshes, double logouts) skip the database.
+# Entries are useless once the token expired, which bounds their TTL.
+_blacklisted_jtis = LocalTTLCache(
+    maxsize=settings.TOKEN_BLACKLIST_CACHE_SIZE,
+    ttl=api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+)
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in _blacklisted_jtis:
+            raise TokenError(_('Token is blacklisted'))
+        try:
+            super().check_blacklist()
+        except TokenError:
+            _blacklisted_jtis.set(jti, True)
+            raise
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # Tokens are outstanding from the moment they are issued, use the row directly
+        # instead of loading the user to get_or_create it
+        token = OutstandingToken.objects.filter(jti=jti).first()
+        if token is None:
+            result = super().blacklist()
+        else:
+            result = BlacklistedToken.objects.get_or_create(token=token)
+        _blacklisted_jtis.set(jti, True)
+        return result
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken
+# ================ END OF REFRESH TOKENS ================
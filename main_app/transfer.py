@@ -0,0 +1,159 @@
+import csv
+import json
+import time
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from main_app.models import Event
+from main_app.serializers import EventSerializer, combine_date_time
+from main_app import caching, stats
+
+# ================ EVENT EXPORT ================
+# Events are read with values_list().iterator(), a chunk of rows at a time (a server-side
+# cursor on PostgreSQL), and rendered line by line, so memory use does not grow with the
+# number of events. The columns match EventSerializer, an export can be imported again.
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_FIELDS = (
+    'id', 'title', 'description', 'date', 'time', 'location',
+    'created_by', 'created_by_username', 'attendee_count', 'confirmed_count',
+)
+LINES_PER_CHUNK = 500 # Lines joined into each chunk sent to the client
+
+def export_rows(queryset, chunk_size=None):
+    rows = queryset.order_by('pk').values_list(
+        'pk', 'title', 'description', 'date', 'location',
+        'created_by_id', 'created_by__username', 'attendee_count', 'confirmed_count',
+    ).iterator(chunk_size=chunk_size or settings.EVENT_EXPORT_CHUNK_SIZE)
+    for pk, title, description, date, location, created_by, username, attendees, confirmed in rows:
+        yield {
+            'id': pk,
+            'title': title,
+            'description': description,
+            'date': date.date().isoformat(),
+            'time': date.time().isoformat(),
+            'location': location,
+            'created_by': created_by,
+            'created_by_username': username,
+            'attendee_count': attendees,
+            'confirmed_count': confirmed,
+        }
+
+class _Echo:
+    # File-like object for csv.writer, write() returns the line instead of buffering it
+    def write(self, value):
+        return value
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+# Yields the export as text chunks of LINES_PER_CHUNK lines
+def render(rows, output):
+    lines = _csv_lines(rows) if output == 'csv' else _ndjson_lines(rows)
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+# ================ END OF EVENT EXPORT ================
+
+# ================ EVENT IMPORT ================
+# Rows are validated with the EventSerializer rules and inserted with bulk_create, a batch
+# per transaction. Invalid rows are skipped and reported with their line number.
+MAX_REPORTED_ERRORS = 100
+
+# Decoded lines of a request body. Reading stops before the line that goes past max_bytes,
+# `truncated` then tells the rest of the body was not imported.
+class LimitedLines:
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.truncated = False
+
+    def __iter__(self):
+        read = 0
+        for line in self.stream:
+            read += len(line)
+            if read > self.max_bytes:
+                self.truncated = True
+                return
+            yield line.decode('utf-8-sig', errors='replace')
+
+# Parsers take an iterable of text lines and yield (line number, row), row is None when
+# the line cannot be parsed
+def parse_ndjson(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+def parse(lines, input_format):
+    return parse_csv(lines) if input_format == 'csv' else parse_ndjson(lines)
+
+def _insert(events):
+    with transaction.atomic():
+        created = Event.objects.bulk_create(events)
+        Event.objects.filter(pk__in=[event.pk for event in created]).update_search_vector()
+    return len(created)
+
+# Creates the events of the parsed rows as `user`, up to max_rows rows (valid or not, the rows
+# after them are not read and `truncated` is set). Returns the counts, the first errors and
+# the throughput in rows per second.
+def import_events(rows, user, batch_size=None, max_rows=None):
+    batch_size = batch_size or settings.EVENT_IMPORT_BATCH_SIZE
+    max_rows = max_rows or settings.EVENT_IMPORT_MAX_ROWS
+    serializer = EventSerializer() # One instance, its fields are built once for all the rows
+    result = {'created': 0, 'invalid': 0, 'truncated': False, 'errors': []}
+    start = time.perf_counter()
+    batch = []
+    for number, row in rows:
+        if result['created'] + len(batch) + result['invalid'] >= max_rows:
+            result['truncated'] = True
+            break
+        try:
+            if row is None:
+                raise serializers.ValidationError('Invalid JSON.')
+            data = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            result['invalid'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'line': number, 'errors': exc.detail})
+            continue
+        batch.append(Event(
+            title=data['title'],
+            description=data.get('description'),
+            location=data['location'],
+            date=combine_date_time(data['date'], data['time']),
+            created_by=user,
+        ))
+        if len(batch) >= batch_size:
+            result['created'] += _insert(batch)
+            batch = []
+    if batch:
+        result['created'] += _insert(batch)
+    elapsed = time.perf_counter() - start
+    if result['created']:
+        stats.invalidate_user_stats(user.pk)
+        caching.bump_event_versions()
+    result['seconds'] = round(elapsed, 3)
+    result['rows_per_second'] = round((result['created'] + result['invalid']) / elapsed, 1) if elapsed else 0
+    return result
+# ================ END OF EVENT IMPORT ================
@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.urls import path
 
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from main_app import views
 
+# Native async read views for ASGI deployments (settings.ASYNC_VIEWS)
+if settings.ASYNC_VIEWS:
+    EventListView, EventDetailView = views.AsyncEventListView, views.AsyncEventDetailView
+    MyEventsView, UserStatsView = views.AsyncMyEventsView, views.AsyncUserStatsView
+else:
+    EventListView, EventDetailView = views.EventListView, views.EventDetailView
+    MyEventsView, UserStatsView = views.MyEventsView, views.UserStatsView
+
 urlpatterns = [
     # ================ AUTH AND USER ROUTES ================
     path('auth/signup/', views.UserSignUpView.as_view(), name='user-signup'),
@@ -13,13 +21,16 @@ urlpatterns = [
     path('auth/delete-account/', views.UserDeleteAccountView.as_view(), name='user-delete-account'),
 
     # ================ EVENT ROUTES ================
-    path('events/', views.EventListView.as_view(), name='event-list'),
-    path('events/my-events/', views.MyEventsView.as_view(), name='my-events'),
+    path('events/', EventListView.as_view(), name='event-list'),
+    path('events/my-events/', MyEventsView.as_view(), name='my-events'),
+    path('events/calendar/', views.EventCalendarView.as_view(), name='event-calendar'),
     path('events/my-attending/', views.MyAttendingEventsView.as_view(), name='my-attending-events'),
-    path('events/<int:id>/', views.EventDetailView.as_view(), name='event-detail'),
+    path('events/<int:id>/', EventDetailView.as_view(), name='event-detail'),
     path('events/create/', views.EventCreateView.as_view(), name='event-create'),
     path('events/<int:id>/update/', views.EventUpdateView.as_view(), name='event-update'),
     path('events/<int:id>/delete/', views.EventDeleteView.as_view(), name='event-delete'),
+    path('events/export/', views.EventExportView.as_view(), name='event-export'),
+    path('events/import/', views.EventImportView.as_view(), name='event-import'),
     
     # ================ ATTENDEE ROUTES ================
     path('events/<int:id>/attendees/', views.EventAttendeesView.as_view(), name='event-attendees'),
@@ -27,11 +38,25 @@ urlpatterns = [
     path('events/<int:id>/cancel-attendance/', views.EventCancelAttendanceView.as_view(), name='event-cancel-attendance'),
     path('events/<int:id>/confirm-attendance/', views.EventConfirmAttendanceView.as_view(), name='event-confirm-attendance'),
     path('events/<int:id>/decline-attendance/', views.EventDeclineAttendanceView.as_view(), name='event-decline-attendance'),
+    path('events/<int:id>/live/', views.EventLiveView.as_view(), name='event-live'),
+    path('events/<int:id>/attendees/bulk/', views.EventBulkAttendeesView.as_view(), name='event-attendees-bulk'),
+    path('events/attend/bulk/', views.BulkAttendView.as_view(), name='event-attend-bulk'),
+
+    # ================ CHANGE FEED ROUTES ================
+    path('changes/', views.ChangesView.as_view(), name='changes'),
 
     # ================ USER STATS ROUTES ================
-    path('stats/user/', views.UserStatsView.as_view(), name='user-stats'),
+    path('stats/user/', UserStatsView.as_view(), name='user-stats'),
 
     # ================ JWT AUTH ROUTES ================
-    path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('auth/token/', views.ThrottledTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', views.CustomTokenRefreshView.as_view(), name='token_refresh'),
-]
\ No newline at end of file
+]
+
+# ================ METRICS ROUTE ================
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path('metrics/', views.MetricsView.as_view(), name='metrics'))
+
+# ================ REPLICA HEALTH ROUTE ================
+if settings.DATABASE_REPLICAS:
+    urlpatterns.append(path('health/replicas/', views.ReplicaHealthView.as_view(), name='replica-health'))
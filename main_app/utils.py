@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+# Small process-local cache: bounded (least recently used entries are evicted first),
+# entries expire after `ttl` seconds, safe to share between the threads of a worker.
+class LocalTTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# Cache backends that keep their data in the worker process: every worker has its own copy, so
+# what one worker writes (a version bump, an incr) is not seen by the others
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Whether the default Django cache is shared by the workers (e.g. redis, memcached). The caches
+# invalidated through it (authenticated users, user stats, responses) are only used then.
+def shared_cache():
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
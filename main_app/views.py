@@ -2,17 +2,29 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
-from main_app.models import Event, Attendee
+from main_app.tokens import CachedBlacklistRefreshToken
+from main_app.models import Event, Attendee, Tombstone
 from main_app.serializers import (
     UserPasswordUpdateSerializer, UserSerializer, UserSignupSerializer, 
     UserUpdateSerializer, UserSigninSerializer, 
-    EventSerializer, AttendeeSerializer
+    EventSerializer, AttendeeSerializer, AttendeeCompactSerializer, FieldSelection,
+    BulkEventAttendeesSerializer, BulkUserAttendanceSerializer
 )
+from main_app.async_api import AsyncAPIView
+from main_app.pagination import AttendeeCursorPagination, EventCursorPagination
+from main_app.search import get_search_backend
+from main_app.throttling import AccountThrottle, IPThrottle
+from main_app import attendance, caching, changes, live, metrics, routers, stats, transfer
+from main_app.authentication import QueryTokenJWTAuthentication, invalidate_user
+import hmac
 from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, DateField, Exists, OuterRef, Q
+from django.db.models.functions import TruncDate, TruncWeek
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
 from django.conf import settings
+from django.contrib.auth import get_user_model
 
 
 User = settings.AUTH_USER_MODEL
@@ -22,6 +34,8 @@ User = settings.AUTH_USER_MODEL
 # ==================== AUTHENTICATION AND USER VIEWS ====================
 class UserSignUpView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPThrottle]
+    throttle_scope = 'signup'
 
     def post(self, request):
         try:
@@ -29,7 +43,7 @@ class UserSignUpView(APIView):
             if serializer.is_valid():
                 user = serializer.save()
                 # Create tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = CachedBlacklistRefreshToken.for_user(user)
                 access_token = refresh.access_token
                 return Response(
                     {
@@ -51,14 +65,17 @@ class UserSignUpView(APIView):
 
 class UserSignInView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = 'signin'
+    throttle_account_fields = ['username_or_email']
 
     def post(self, request):
         try:
-            serializer = UserSigninSerializer(data=request.data)
+            serializer = UserSigninSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
                 user = serializer.validated_data['user']
                 # Create tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = CachedBlacklistRefreshToken.for_user(user)
                 access_token = refresh.access_token
                 return Response({
                     'message': 'User signed in successfully',
@@ -110,6 +127,8 @@ class UserProfileView(APIView):
             serializer = UserUpdateSerializer(user, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.update(user, request.data)
+                invalidate_user(user.pk)
+                caching.bump_profile_version() # The user is nested in the event responses
                 return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
             return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
         except Exception as e:
@@ -122,14 +141,17 @@ class UserProfileView(APIView):
     
 class UserPasswordUpdateView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [AccountThrottle]
+    throttle_scope = 'password_update'
 
     def put(self, request):
         try:
             serializer = UserPasswordUpdateSerializer(data=request.data, context={'request': request})
             if serializer.is_valid():
                 user = serializer.save()
+                invalidate_user(user.pk)
                 # Create new tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = CachedBlacklistRefreshToken.for_user(user)
                 access_token = refresh.access_token
                 return Response({
                     'message': 'Password updated successfully',
@@ -156,7 +178,7 @@ class UserLogoutView(APIView):
                     {"error": "Refresh token is required."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {"error": "Successfully logged out."},
@@ -182,10 +204,19 @@ class UserDeleteAccountView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             # Blacklist the refresh token
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
-            # Delete the user
-            user.delete()
+            # Attendees of the user's events lose them from their stats
+            attendee_ids = Attendee.objects.filter(event__created_by=user).values_list('user_id', flat=True).distinct()
+            stats.invalidate_user_stats(*attendee_ids)
+            # Delete the user (and take their registrations out of the event counters)
+            user_id = user.pk
+            with transaction.atomic():
+                attendance.remove_user_attendances(user)
+                changes.record_deleted_events(Event.objects.filter(created_by=user))
+                user.delete()
+            invalidate_user(user_id)
+            caching.bump_profile_version()
             return Response(
                 {"error": "Account and associated tokens deleted successfully."},
                 status=status.HTTP_204_NO_CONTENT
@@ -202,39 +233,115 @@ class EventListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        queryset = Event.objects.all()
-        
-        # Search filter (by title, created_by username, description, or location)
-        search = request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(created_by__username__icontains=search) |
-                Q(description__icontains=search) |
-                Q(location__icontains=search)
-            )
-        # Date filter
-        date = request.query_params.get('date', None)
-        if date:
-            try:
-                # Validate and parse date string
-                date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-                queryset = queryset.filter(date__gte=date_obj, date__lt=date_obj+timedelta(days=1))
-            except ValueError:
-                return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, 
-                               status=status.HTTP_400_BAD_REQUEST)
-        queryset = queryset.order_by('-date')
-        serializer = EventSerializer(queryset, many=True, context={'request': request, 'list_view': True})
+        # Conditional GET / cached response (settings.RESPONSE_CACHE)
+        etag, response = caching.lookup(request, caching.event_list_parts)
+        if response is not None:
+            return response
+        return caching.store(etag, self.list_events(request))
+
+    def list_events(self, request):
+        try:
+            queryset = filter_event_list(request, EventSerializer.setup_eager_loading(Event.objects.all(), request))
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        # Cursor pagination (opt-in with ?cursor= or ?page_size=)
+        paginator = EventCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        if page is not None:
+            serializer = EventSerializer(page, many=True, context={'request': request, 'list_view': True})
+            return paginator.get_paginated_response(serializer.data)
+        serializer = EventSerializer(order_event_list(request, queryset), many=True, context={'request': request, 'list_view': True})
         return Response(serializer.data, status=status.HTTP_200_OK)
-    
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+# Midnight starting `day`, in the current time zone when USE_TZ is on: the days TruncDate
+# buckets the calendar by
+def start_of_day(day):
+    value = datetime.combine(day, datetime.min.time())
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+# Filters of the event list, shared by the sync and async views.
+# Raises ValueError when a date is invalid.
+def filter_event_list(request, queryset):
+    # Search filter (by title, created_by username, description, or location)
+    search = request.query_params.get('search', None)
+    if search:
+        queryset = get_search_backend().search(queryset, search)
+    # Date filter
+    date = request.query_params.get('date', None)
+    if date:
+        # Validate and parse date string
+        date_obj = parse_date(date)
+        queryset = queryset.filter(date__gte=start_of_day(date_obj), date__lt=start_of_day(date_obj+timedelta(days=1)))
+    # Date range filter (?from=YYYY-MM-DD&to=YYYY-MM-DD, both days included), a range scan of the date index
+    date_from = request.query_params.get('from', None)
+    if date_from:
+        queryset = queryset.filter(date__gte=start_of_day(parse_date(date_from)))
+    date_to = request.query_params.get('to', None)
+    if date_to:
+        queryset = queryset.filter(date__lt=start_of_day(parse_date(date_to) + timedelta(days=1)))
+    return queryset
+
+# Ordering of the unpaginated event list: most relevant first when searching
+def order_event_list(request, queryset):
+    if request.query_params.get('search', None):
+        return get_search_backend().order_by_relevance(queryset)
+    return queryset.order_by('-date')
+
+# Event counts per day (or per week, ?group=week) between ?from= and ?to= for the calendar, in
+# one GROUP BY query. ?flags=true adds the number of events the user attends/created per bucket.
+# ?search= filters the events like the event list.
+class EventCalendarView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        group = request.query_params.get('group', 'day')
+        if group not in ('day', 'week'):
+            return Response({'error': 'Invalid group. Use day or week.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from, date_to = parse_date(request.query_params['from']), parse_date(request.query_params['to'])
+        except KeyError:
+            return Response({'error': 'from and to are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (date_to - date_from).days < settings.EVENT_CALENDAR_MAX_DAYS:
+            return Response({'error': f'to must be after from, at most {settings.EVENT_CALENDAR_MAX_DAYS} days apart.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        etag, response = caching.lookup(request, caching.event_list_parts)
+        if response is not None:
+            return response
+        queryset = filter_event_list(request, Event.objects.all())
+        trunc = TruncDate('date') if group == 'day' else TruncWeek('date', output_field=DateField())
+        aggregates = {'events': Count('id')}
+        if request.query_params.get('flags', None) == 'true':
+            attending = Attendee.objects.filter(event=OuterRef('pk'), user=request.user)
+            aggregates['attending'] = Count('id', filter=Q(Exists(attending)))
+            aggregates['created'] = Count('id', filter=Q(created_by=request.user))
+        buckets = (
+            queryset.order_by().annotate(bucket=trunc).values('bucket')
+            .annotate(**aggregates).order_by('bucket')
+        )
+        return caching.store(etag, Response({
+            'from': date_from,
+            'to': date_to,
+            'group': group,
+            'buckets': [{'date': row.pop('bucket'), **row} for row in buckets],
+        }, status=status.HTTP_200_OK))
+
 class EventDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id):
+        etag, response = caching.lookup(request, caching.event_detail_parts, id)
+        if response is not None:
+            return response
         try:
-            event = Event.objects.get(pk=id)
+            event = EventSerializer.setup_eager_loading(Event.objects.all(), request).get(pk=id)
             serializer = EventSerializer(event, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return caching.store(etag, Response(serializer.data, status=status.HTTP_200_OK))
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -242,7 +349,12 @@ class MyEventsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        events = Event.objects.filter(created_by=request.user)
+        events = EventSerializer.setup_eager_loading(Event.objects.all(), request).filter(created_by=request.user)
+        paginator = EventCursorPagination()
+        page = paginator.paginate_queryset(events, request)
+        if page is not None:
+            serializer = EventSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
         serializer = EventSerializer(events, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -253,6 +365,8 @@ class EventCreateView(APIView):
         serializer = EventSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
+            stats.record_event_created(request.user.pk)
+            caching.bump_event_versions()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -266,9 +380,14 @@ class EventUpdateView(APIView):
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         if event.created_by != request.user:
             return Response({'error': 'You do not have permission to update this event'}, status=status.HTTP_403_FORBIDDEN)
+        previous_date = event.date
         serializer = EventSerializer(event, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             event = serializer.save()
+            caching.bump_event_versions(event.pk)
+            if event.date != previous_date:
+                # Moving the event can change the attendees' upcoming/pending stats
+                stats.invalidate_user_stats(*event.attendees.values_list('user_id', flat=True))
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -278,7 +397,13 @@ class EventDeleteView(APIView):
     def delete(self, request, id):
         try:
             event = Event.objects.get(pk=id)
-            event.delete()
+            attendee_ids = list(event.attendees.values_list('user_id', flat=True))
+            with transaction.atomic():
+                changes.record_deleted_events([event])
+                event.delete()
+                live.publish_deleted(id)
+            stats.invalidate_user_stats(event.created_by_id, *attendee_ids)
+            caching.bump_event_versions(id)
             return Response({'message': 'Event deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -287,23 +412,137 @@ class MyAttendingEventsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        events = Event.objects.filter(attendees__user=request.user)
+        # Filter through a subquery so the attendees join used for the counts is not restricted to this user
+        attending = Attendee.objects.filter(user=request.user).values('event')
+        events = EventSerializer.setup_eager_loading(Event.objects.all(), request).filter(pk__in=attending)
+        paginator = EventCursorPagination()
+        page = paginator.paginate_queryset(events, request)
+        if page is not None:
+            serializer = EventSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
         serializer = EventSerializer(events, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
+# Stream the whole catalog as NDJSON (default) or CSV, e.g. ?output=csv
+class EventExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in transfer.FORMATS:
+            return Response({'error': f'Invalid output. Use one of: {", ".join(transfer.FORMATS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            transfer.render(transfer.export_rows(Event.objects.all()), output),
+            content_type=transfer.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="events.{output}"'
+        return response
+
+# Create events from an NDJSON (application/x-ndjson) or CSV (text/csv) body, read line by line.
+# At most EVENT_IMPORT_MAX_ROWS rows and EVENT_IMPORT_MAX_BYTES bytes are imported per request,
+# `truncated` in the response tells the rest was not read.
+class EventImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [AccountThrottle]
+    throttle_scope = 'import'
+
+    def post(self, request):
+        formats = {content_type: name for name, content_type in transfer.CONTENT_TYPES.items()}
+        input_format = formats.get(request.content_type.split(';')[0].strip())
+        if input_format is None:
+            return Response({'error': 'Send application/x-ndjson or text/csv.'},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > settings.EVENT_IMPORT_MAX_BYTES:
+            return Response({'error': f'The body is larger than {settings.EVENT_IMPORT_MAX_BYTES} bytes, split the import.'},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if request.stream is None:
+            return Response({'error': 'The request body is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Checked while reading too: an ASGI body may come without a Content-Length
+        lines = transfer.LimitedLines(request.stream, settings.EVENT_IMPORT_MAX_BYTES)
+        result = transfer.import_events(transfer.parse(lines, input_format), request.user)
+        result['truncated'] = result['truncated'] or lines.truncated
+        return Response(result, status=status.HTTP_200_OK)
+
+# Server-sent events with the attendee counts of the event, pushed when they change (ASGI only,
+# see main_app.live). The access token can be passed as ?access_token= for EventSource.
+class EventLiveView(AsyncAPIView):
+    authentication_class = QueryTokenJWTAuthentication
+
+    async def get(self, request, id):
+        if 'wsgi.version' in request.META:
+            # A WSGI server would buffer the endless stream before sending anything
+            return Response({'error': 'Live updates require the ASGI server.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        stream = await live.open_stream(id)
+        if stream is None:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no' # nginx: do not buffer the stream
+        return response
+
+# Incremental sync: everything that changed since the `since` cursor of the previous response
+# (no cursor: every event and attendance). Follow `cursor` while `has_more` is true.
+class ChangesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            results, cursor, has_more = changes.ChangeFeed(request).get_changes(request.query_params.get('since', None))
+        except ValueError:
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+        except changes.CursorExpired:
+            return Response({'error': 'The cursor expired, sync again without since.'}, status=status.HTTP_410_GONE)
+        deleted = {'events': [], 'attendances': []}
+        for tombstone in results['t']:
+            deleted['events' if tombstone.kind == Tombstone.EVENT else 'attendances'].append(tombstone.object_id)
+        return Response({
+            'events': EventSerializer(results['e'], many=True, context={'request': request, 'list_view': True}).data,
+            'attendances': [
+                {'id': attendee.pk, 'event_id': attendee.event_id, 'confirmed': attendee.confirmed}
+                for attendee in results['a']
+            ],
+            'deleted': deleted,
+            'cursor': cursor,
+            'has_more': has_more,
+        }, status=status.HTTP_200_OK)
+
 # ===================== END OF EVENT VIEWS ====================
 
 # ===================== ATTENDEE VIEWS ====================
 class EventAttendeesView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # ?status=confirmed|pending filters the attendees. ?compact=true returns the event once and
+    # a cursor-paginated page of compact attendee rows. Constant number of queries either way.
     def get(self, request, id):
+        selection = FieldSelection.from_request(request)
         try:
-            event = Event.objects.get(pk=id)
-            attendees = event.attendees.all()
-            serializer = AttendeeSerializer(attendees, many=True, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            event = EventSerializer.setup_eager_loading(Event.objects.all(), request, selection.nested('event')).get(pk=id)
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        attendees = event.attendees.select_related('user') # Every row gets `event` as its event
+        attendee_status = request.query_params.get('status', None)
+        if attendee_status:
+            if attendee_status not in ('confirmed', 'pending'):
+                return Response({'error': 'Invalid status. Use confirmed or pending.'}, status=status.HTTP_400_BAD_REQUEST)
+            attendees = attendees.filter(confirmed=attendee_status == 'confirmed')
+        if request.query_params.get('compact', None) == 'true':
+            paginator = AttendeeCursorPagination()
+            page = paginator.paginate_queryset(attendees, request, view=self)
+            event_serializer = EventSerializer(event, context={'request': request}, selection=selection.nested('event'))
+            return Response({
+                'event': event_serializer.data,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': AttendeeCompactSerializer(page, many=True, selection=selection.without('event')).data,
+            }, status=status.HTTP_200_OK)
+        # Same shape as before, the nested event is serialized once and reused for every row
+        serializer = AttendeeSerializer(attendees, many=True, context={'request': request, 'event_cache': {}})
+        return Response(serializer.data, status=status.HTTP_200_OK)
     def post(self, request, id):
         try:
             event = Event.objects.get(pk=id)
@@ -311,7 +550,9 @@ class EventAttendeesView(APIView):
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         serializer = AttendeeSerializer(data=request.data)
         if serializer.is_valid():
-            attendee = serializer.save(user=request.user, event=event)
+            attendee, created = attendance.register(request.user, event)
+            if not created:
+                return Response({'error': 'You are already registered for this event.'}, status=status.HTTP_400_BAD_REQUEST)
             return Response(AttendeeSerializer(attendee).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -323,7 +564,8 @@ class EventAttendView(APIView):
             event = Event.objects.get(pk=id)
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
-        attendee, created = Attendee.objects.get_or_create(user=request.user, event=event)
+        attendee, created = attendance.register(request.user, event)
+        event = EventSerializer.setup_eager_loading(Event.objects.all(), request).get(pk=event.pk)
         serializer = EventSerializer(event, context={'request': request})
         if created:
             return Response({'message': 'Successfully registered for the event', 'event': serializer.data}, status=status.HTTP_201_CREATED)
@@ -338,9 +580,7 @@ class EventConfirmAttendanceView(APIView):
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            attendee = Attendee.objects.get(user=request.user, event=event)
-            attendee.confirmed = True
-            attendee.save()
+            attendance.confirm(request.user, event)
             return Response({'message': 'Attendance confirmed successfully'}, status=status.HTTP_200_OK)
         except Attendee.DoesNotExist:
             return Response({'error': 'You are not registered for this event'}, status=status.HTTP_404_NOT_FOUND)
@@ -354,9 +594,7 @@ class EventDeclineAttendanceView(APIView):
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            attendee = Attendee.objects.get(user=request.user, event=event)
-            attendee.confirmed = False
-            attendee.save()
+            attendance.decline(request.user, event)
             return Response({'message': 'Attendance declined successfully'}, status=status.HTTP_200_OK)
         except Attendee.DoesNotExist:
             return Response({'error': 'You are not registered for this event'}, status=status.HTTP_404_NOT_FOUND)
@@ -370,11 +608,39 @@ class EventCancelAttendanceView(APIView):
         except Event.DoesNotExist:
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            attendee = Attendee.objects.get(user=request.user, event=event)
-            attendee.delete()
+            attendance.cancel(request.user, event)
             return Response({'message': 'Attendance cancelled successfully'}, status=status.HTTP_204_NO_CONTENT)
         except Attendee.DoesNotExist:
             return Response({'error': 'You are not registered for this event'}, status=status.HTTP_404_NOT_FOUND)
+# Organizer: register, confirm, decline or cancel many users of an event in one request
+class EventBulkAttendeesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, id):
+        try:
+            event = Event.objects.get(pk=id)
+        except Event.DoesNotExist:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        if event.created_by_id != request.user.pk:
+            return Response({'error': 'You do not have permission to manage the attendees of this event'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BulkEventAttendeesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        action = serializer.validated_data['action']
+        results = attendance.bulk_apply(action, serializer.validated_data['user_ids'], event=event)
+        return Response({'action': action, 'results': results}, status=status.HTTP_200_OK)
+
+# Current user: register, confirm, decline or cancel many events in one request
+class BulkAttendView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkUserAttendanceSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        action = serializer.validated_data['action']
+        results = attendance.bulk_apply(action, serializer.validated_data['event_ids'], user=request.user)
+        return Response({'action': action, 'results': results}, status=status.HTTP_200_OK)
 # ===================== END OF ATTENDEE VIEWS ====================
 
 # ===================== USER STATS VIEWS ====================
@@ -382,41 +648,112 @@ class EventCancelAttendanceView(APIView):
 class UserStatsView(APIView):
     permission_classes = [IsAuthenticated]
     
-    def get(self, request):        
-        user = request.user
-        created_events_count = Event.objects.filter(created_by=user).count() # Count created events
-        attending_events = Attendee.objects.filter(user=user)
-        attending_events_count = attending_events.count() # Count attending events
-        confirmed_events_count = attending_events.filter(confirmed=True).count() # Count confirmed events
-        current_datetime = timezone.now()
-        pending_events_count = 0  # Count pending events (not confirmed and not past)
-        for attendee in attending_events.filter(confirmed=False):
-            if attendee.event.date >= current_datetime:
-                pending_events_count += 1
-        upcoming_events_count = 0 # Count upcoming events (attending events not past)
-        for attendee in attending_events:
-            if attendee.event.date >= current_datetime:
-                upcoming_events_count += 1
-        
-        return Response({
-            'created_events': created_events_count,
-            'attending_events': attending_events_count,
-            'confirmed_events': confirmed_events_count,
-            'pending_events': pending_events_count,
-            'upcoming_events': upcoming_events_count,
-        })
+    def get(self, request):
+        # One aggregate query, or none when the per-user stats cache is enabled
+        return Response(stats.get_user_stats(request.user))
 # ===================== END OF USER STATS VIEWS ====================
 
+# ===================== ASYNC READ VIEWS ====================
+# Native async versions of the read endpoints for ASGI servers, routed instead of the sync
+# views when settings.ASYNC_VIEWS is on. Same responses, the queries use the async ORM.
+class AsyncEventListView(AsyncAPIView):
+    async def get(self, request):
+        etag, response = await caching.alookup(request, caching.event_list_parts)
+        if response is not None:
+            return response
+        return await caching.astore(etag, await self.list_events(request))
+
+    async def list_events(self, request):
+        try:
+            queryset = filter_event_list(request, EventSerializer.setup_eager_loading(Event.objects.all(), request))
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, 
+                           status=status.HTTP_400_BAD_REQUEST)
+        return await paginate_events_async(request, queryset, order_event_list(request, queryset),
+                                           {'request': request, 'list_view': True})
+
+class AsyncEventDetailView(AsyncAPIView):
+    async def get(self, request, id):
+        etag, response = await caching.alookup(request, caching.event_detail_parts, id)
+        if response is not None:
+            return response
+        try:
+            event = await EventSerializer.setup_eager_loading(Event.objects.all(), request).aget(pk=id)
+        except Event.DoesNotExist:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = EventSerializer(event, context={'request': request})
+        return await caching.astore(etag, Response(serializer.data, status=status.HTTP_200_OK))
+
+class AsyncMyEventsView(AsyncAPIView):
+    async def get(self, request):
+        events = EventSerializer.setup_eager_loading(Event.objects.all(), request).filter(created_by=request.user)
+        return await paginate_events_async(request, events, events, {'request': request})
+
+class AsyncUserStatsView(AsyncAPIView):
+    async def get(self, request):
+        return Response(await stats.aget_user_stats(request.user))
+
+# Cursor page of `queryset` when requested, otherwise all of `unpaginated`. The rows are fetched
+# with the async ORM, serializing them afterwards runs no query (setup_eager_loading() loads the
+# creator and annotates the user's status).
+async def paginate_events_async(request, queryset, unpaginated, context):
+    paginator = EventCursorPagination()
+    if paginator.is_requested(request):
+        page = paginator.paginate_rows([event async for event in paginator.get_page_queryset(queryset, request)])
+        serializer = EventSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+    events = [event async for event in unpaginated]
+    serializer = EventSerializer(events, many=True, context=context)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+# ===================== END OF ASYNC READ VIEWS ====================
+
 # ===================== TOKEN VIEWS ====================
-from rest_framework_simplejwt.views import TokenRefreshView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = 'token'
+    throttle_account_fields = ['username']
+
 class CustomTokenRefreshView(TokenRefreshView):
+    throttle_classes = [IPThrottle]
+    throttle_scope = 'token_refresh'
+
     def post(self, request, *args, **kwargs):
         try:
             return super().post(request, *args, **kwargs)
-        except User.DoesNotExist:
+        except get_user_model().DoesNotExist:
             # If the user doesn't exist, return an error and let the frontend handle it
             return Response(
                 {"detail": "User associated with this token no longer exists."},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-# ===================== END OF TOKEN STATS VIEWS ====================
\ No newline at end of file
+# ===================== END OF TOKEN STATS VIEWS ====================
+# ===================== METRICS VIEW ====================
+# Prometheus scrape endpoint (settings.METRICS_ENABLED), the metrics of every worker process
+class MetricsView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response({'error': 'Invalid metrics token.'}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(metrics.render_prometheus(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+# ===================== END OF METRICS VIEW ====================
+# ===================== REPLICA HEALTH VIEW ====================
+# Replication lag of every replica (settings.DATABASE_REPLICAS) as last checked by the router,
+# at most REPLICA_CHECK_INTERVAL seconds old: requests to this public endpoint never query the
+# replicas themselves. 503 when one is unreachable or lags more than REPLICA_MAX_LAG_SECONDS,
+# for load balancers and alerting.
+class ReplicaHealthView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        replicas = routers.replica_statuses()
+        healthy = all(replica['healthy'] for replica in replicas)
+        return Response(
+            {'healthy': healthy, 'max_lag': settings.REPLICA_MAX_LAG_SECONDS, 'replicas': replicas},
+            status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+# ===================== END OF REPLICA HEALTH VIEW ====================